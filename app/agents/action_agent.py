@@ -9,6 +9,28 @@ from app.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Days until follow-up per event type (None = no follow-up)
+_FOLLOWUP_DAYS = {
+    'confirmation': 7,
+    'rejection': None,
+    'interview': 3,
+    'assessment': 2,
+    'offer': 3,
+    'update': 5,
+}
+
+# Suggested action per event type; {company} is filled in at run time
+_ACTION_MSGS = {
+    'confirmation': "Application confirmed. Follow up if no response in 7-10 days.",
+    'rejection': "Application not selected. Consider requesting feedback (optional). Keep applying!",
+    'interview': "Interview scheduled! Prepare: research {company}, review role requirements, prepare questions.",
+    'assessment': "Complete coding/technical assessment. Review requirements carefully. Set aside focused time.",
+    'offer': "🎉 Offer received! Review terms, negotiate if needed, respond within deadline.",
+    'update': "Application update received. Review details and wait for next steps.",
+}
+
+_DEFAULT_ACTION = "Review email and take appropriate action."
+
 
 class ActionAgent:
     """Agent to suggest next actions and follow-ups."""
@@ -29,41 +51,19 @@ class ActionAgent:
         """
         company = extracted_data.get('company', 'the company')
         
-        # Generate suggestions based on event type
-        if event_type == 'confirmation':
-            action = f"Application confirmed. Follow up if no response in 7-10 days."
-            follow_up_date = (datetime.utcnow() + timedelta(days=7)).isoformat()
+        # Look up suggestion and follow-up window for this event type
+        action = _ACTION_MSGS.get(event_type, _DEFAULT_ACTION).format(company=company)
+        days = _FOLLOWUP_DAYS.get(event_type, 7)
         
-        elif event_type == 'rejection':
-            action = f"Application not selected. Consider requesting feedback (optional). Keep applying!"
+        if days is None:
             follow_up_date = None
-        
-        elif event_type == 'interview':
-            action = f"Interview scheduled! Prepare: research {company}, review role requirements, prepare questions."
-            # Check if date in extracted data
-            key_dates = extracted_data.get('key_dates', [])
-            if key_dates:
-                follow_up_date = key_dates[0]
-            else:
-                follow_up_date = (datetime.utcnow() + timedelta(days=3)).isoformat()
-        
-        elif event_type == 'assessment':
-            action = f"Complete coding/technical assessment. Review requirements carefully. Set aside focused time."
-            follow_up_date = (datetime.utcnow() + timedelta(days=2)).isoformat()
-        
-        elif event_type == 'offer':
-            action = f"🎉 Offer received! Review terms, negotiate if needed, respond within deadline."
-            follow_up_date = (datetime.utcnow() + timedelta(days=3)).isoformat()
-        
-        elif event_type == 'update':
-            action = f"Application update received. Review details and wait for next steps."
-            follow_up_date = (datetime.utcnow() + timedelta(days=5)).isoformat()
-        
+        elif event_type == 'interview' and extracted_data.get('key_dates'):
+            # Prefer the interview date when one was extracted
+            follow_up_date = extracted_data['key_dates'][0]
         else:
-            action = f"Review email and take appropriate action."
-            follow_up_date = (datetime.utcnow() + timedelta(days=7)).isoformat()
+            follow_up_date = (datetime.utcnow() + timedelta(days=days)).isoformat()
         
-        logger.debug(f"Action for {event_type}: {action}")
+        logger.debug("Action for %s: %s", event_type, action)
         
         return {
             'action_suggestion': action,
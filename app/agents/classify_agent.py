@@ -3,66 +3,137 @@ ClassifyAgent: Classifies job-related emails into event types.
 Determines event_type and suggested status update.
 """
 import re
-from typing import Dict
+from bisect import bisect_right
+from collections import Counter
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 from app.config import EVENT_TYPES, APPLICATION_STATUSES
 from app.utils.logger import setup_logger
 
+# RE2 (google-re2) guarantees linear-time matching; optional, falls back to re
+try:
+    import re2
+except ImportError:
+    re2 = None
+
 logger = setup_logger(__name__)
 
+# Indicator patterns per category, in priority order (lowercase; matched
+# against lowercased text)
+CATEGORIES = {
+    'rejection': (
+        r'unfortunately',
+        r'not\s+(?:moving\s+forward|selected|chosen)',
+        r'will\s+not\s+be\s+(?:moving|proceeding)',
+        r'decided\s+to\s+(?:pursue|move\s+forward\s+with)\s+other',
+        r'have\s+decided\s+not\s+to',
+        r'regret\s+to\s+inform',
+        r'not\s+be\s+considered',
+        r'position\s+has\s+been\s+filled',
+        r'your\s+application\s+was\s+not\s+successful',
+    ),
+    'offer': (
+        r'offer\s+(?:of\s+employment|letter)',
+        r'pleased\s+to\s+offer',
+        r'extend\s+(?:an\s+)?offer',
+        r'congratulations',
+        r'offer\s+package',
+    ),
+    'interview': (
+        r'interview',
+        r'schedule\s+(?:a\s+)?(?:call|meeting|chat)',
+        r'speak\s+with\s+you',
+        r'next\s+step',
+        r'phone\s+(?:screen|call)',
+        r'video\s+call',
+        r'meet\s+with',
+        r'available\s+for\s+(?:a\s+)?(?:call|chat)',
+    ),
+    'assessment': (
+        r'coding\s+(?:challenge|test|assessment)',
+        r'technical\s+(?:challenge|test|assessment)',
+        r'complete\s+(?:the\s+)?(?:assignment|challenge|test)',
+        r'take-home\s+(?:challenge|assignment)',
+        r'hackerrank',
+        r'codility',
+        r'codesignal',
+    ),
+    'confirmation': (
+        r'thank\s+you\s+for\s+(?:applying|your\s+application)',
+        r'application\s+(?:received|submitted)',
+        r'received\s+your\s+application',
+        r'confirm\s+receipt',
+        r'we\s+have\s+received',
+    ),
+}
+
+# (status_update, score multiplier) per category
+CATEGORY_RESULTS = {
+    'rejection': ('rejected', 1.0),
+    'offer': ('offer', 1.2),
+    'interview': ('interview', 1.0),
+    'assessment': ('assessment', 1.0),
+    'confirmation': ('applied', 0.8),
+}
+
+# Cheap substring gate per category: every pattern in CATEGORIES contains at
+# least one of these, so a category with no hint present cannot match.
+_CATEGORY_LITERAL_HINTS = {
+    'rejection': ('unfortunately', 'not', 'regret', 'decided', 'filled'),
+    'offer': ('offer', 'congratulations'),
+    'interview': ('interview', 'schedule', 'speak', 'next', 'phone', 'video', 'meet', 'available'),
+    'assessment': ('coding', 'technical', 'complete', 'take-home', 'hackerrank', 'codility', 'codesignal'),
+    'confirmation': ('thank', 'application', 'received', 'confirm'),
+}
+
+
+def _is_literal(pattern: str) -> bool:
+    """True if the pattern has no regex metacharacters."""
+    return re.escape(pattern) == pattern
+
+
+@lru_cache(maxsize=None)
+def _regexes_for(category: str) -> Tuple[object, ...]:
+    """
+    Compile the regex patterns of one category.
+    
+    Each pattern is scanned on its own, as overlapping patterns (e.g.
+    "we have received" / "received your application") must each count
+    their matches. Plain keywords are left out; they are counted with
+    str.count instead. Patterns are lowercase and matched against
+    lowercased text, so no IGNORECASE is needed. Compiled with RE2 when
+    installed, otherwise with the stdlib re module.
+    
+    Args:
+        category: Category name in CATEGORIES
+    
+    Returns:
+        Compiled patterns, in CATEGORIES order
+    """
+    patterns = tuple(p for p in CATEGORIES[category] if not _is_literal(p))
+    
+    if re2 is not None:
+        try:
+            return tuple(re2.compile(p) for p in patterns)
+        except Exception as e:
+            logger.warning("RE2 could not compile classify patterns, using re: %s", e)
+    return tuple(re.compile(p) for p in patterns)
+
 
 class ClassifyAgent:
     """Agent to classify job email event types."""
     
     def __init__(self):
         self.event_types = EVENT_TYPES
-        self.rejection_patterns = [
-            r'unfortunately',
-            r'not\s+(moving\s+forward|selected|chosen)',
-            r'will\s+not\s+be\s+(moving|proceeding)',
-            r'decided\s+to\s+(pursue|move\s+forward\s+with)\s+other',
-            r'have\s+decided\s+not\s+to',
-            r'regret\s+to\s+inform',
-            r'not\s+be\s+considered',
-            r'position\s+has\s+been\s+filled',
-            r'your\s+application\s+was\s+not\s+successful',
-        ]
-        
-        self.interview_patterns = [
-            r'interview',
-            r'schedule\s+(a\s+)?(call|meeting|chat)',
-            r'speak\s+with\s+you',
-            r'next\s+step',
-            r'phone\s+(screen|call)',
-            r'video\s+call',
-            r'meet\s+with',
-            r'available\s+for\s+(a\s+)?(call|chat)',
-        ]
         
-        self.assessment_patterns = [
-            r'coding\s+(challenge|test|assessment)',
-            r'technical\s+(challenge|test|assessment)',
-            r'complete\s+(the\s+)?(assignment|challenge|test)',
-            r'take-home\s+(challenge|assignment)',
-            r'hackerrank',
-            r'codility',
-            r'codesignal',
-        ]
-        
-        self.confirmation_patterns = [
-            r'thank\s+you\s+for\s+(applying|your\s+application)',
-            r'application\s+(received|submitted)',
-            r'received\s+your\s+application',
-            r'confirm\s+receipt',
-            r'we\s+have\s+received',
-        ]
+        # Plain keywords ("interview", "hackerrank", ...) per category
+        self._literals = {
+            cat: tuple(p for p in pats if _is_literal(p))
+            for cat, pats in CATEGORIES.items()
+        }
         
-        self.offer_patterns = [
-            r'offer\s+(of\s+employment|letter)',
-            r'pleased\s+to\s+offer',
-            r'extend\s+(an\s+)?offer',
-            r'congratulations',
-            r'offer\s+package',
-        ]
+        # Per-instance memo for run_cached (repeat/thread emails)
+        self._run_cached = lru_cache(maxsize=4096)(self._run_impl)
     
     def run(self, email_data: Dict) -> Dict:
         """
@@ -79,57 +150,154 @@ class ClassifyAgent:
                 'indicators': list
             }
         """
-        subject = email_data.get('subject', '').lower()
-        body = email_data.get('body', '').lower()
-        snippet = email_data.get('snippet', '').lower()
+        return self._run_impl(
+            email_data.get('subject', ''),
+            email_data.get('snippet', ''),
+            email_data.get('body', '')
+        )
+    
+    def run_cached(self, email_data: Dict) -> Dict:
+        """
+        Same as run(), memoised on (subject, snippet, body prefix).
+        
+        Only the first 1000 chars of the body are classified, so the key
+        uses a 2000-char prefix and identical resends skip the regex work.
+        
+        Args:
+            email_data: Dictionary with 'subject', 'body', 'snippet'
+        
+        Returns:
+            Same dictionary as run() (a fresh copy per call)
+        """
+        result = self._run_cached(
+            email_data.get('subject', ''),
+            email_data.get('snippet', ''),
+            email_data.get('body', '')[:2000]
+        )
+        return {**result, 'indicators': list(result['indicators'])}
+    
+    def run_batch(self, email_list: List[Dict]) -> List[Dict]:
+        """
+        Classify many emails with one regex sweep per pattern.
         
-        # Combined text
-        combined_text = f"{subject} {snippet} {body[:1000]}"
+        The lowercased texts are joined with NUL separators (no pattern can
+        match across one) and each pattern scans the joined text once; each
+        hit is attributed to its email by bisecting the start offsets.
+        Results match run().
         
-        # Check patterns in priority order
-        results = []
+        Args:
+            email_list: List of dictionaries with 'subject', 'body', 'snippet'
         
-        # 1. Rejection (highest priority)
-        rejection_score = self._match_patterns(combined_text, self.rejection_patterns)
-        if rejection_score > 0:
-            results.append(('rejection', 'rejected', rejection_score))
+        Returns:
+            List of run() result dictionaries, in input order
+        """
+        prepared = [
+            self._prepare(
+                email_data.get('subject', ''),
+                email_data.get('snippet', ''),
+                email_data.get('body', '')
+            )
+            for email_data in email_list
+        ]
+        texts = [text for _, text in prepared]
+        joined = "\x00".join(texts)
         
-        # 2. Offer
-        offer_score = self._match_patterns(combined_text, self.offer_patterns)
-        if offer_score > 0:
-            results.append(('offer', 'offer', offer_score * 1.2))
+        # Offset of each email's text within the joined string
+        starts = []
+        pos = 0
+        for text in texts:
+            starts.append(pos)
+            pos += len(text) + 1
         
-        # 3. Interview
-        interview_score = self._match_patterns(combined_text, self.interview_patterns)
-        if interview_score > 0:
-            results.append(('interview', 'interview', interview_score))
+        live = self._live_categories(joined)
+        scores = [self._count_literals(text, live) for text in texts]
+        for cat in live:
+            for regex in _regexes_for(cat):
+                # Counter tallies hits per email in C
+                hits = Counter(
+                    bisect_right(starts, m.start()) - 1
+                    for m in regex.finditer(joined)
+                )
+                for idx, count in hits.items():
+                    scores[idx][cat] += count
         
-        # 4. Assessment
-        assessment_score = self._match_patterns(combined_text, self.assessment_patterns)
-        if assessment_score > 0:
-            results.append(('assessment', 'assessment', assessment_score))
+        return [
+            self._select(subject, counts)
+            for (subject, _), counts in zip(prepared, scores)
+        ]
+    
+    def _run_impl(self, subject: str, snippet: str, body: str) -> Dict:
+        """Classify from raw subject/snippet/body strings."""
+        subject, combined_text = self._prepare(subject, snippet, body)
         
-        # 5. Confirmation
-        confirmation_score = self._match_patterns(combined_text, self.confirmation_patterns)
-        if confirmation_score > 0:
-            results.append(('confirmation', 'applied', confirmation_score * 0.8))
+        live = self._live_categories(combined_text)
+        
+        # Tally hits per category: keywords first, then each regex
+        scores = self._count_literals(combined_text, live)
+        for cat in live:
+            for regex in _regexes_for(cat):
+                scores[cat] += len(regex.findall(combined_text))
+        
+        return self._select(subject, scores)
+    
+    @staticmethod
+    def _prepare(subject: str, snippet: str, body: str) -> Tuple[str, str]:
+        """Return the lowercased subject and the combined text to classify."""
+        subject = subject.lower()
+        return subject, f"{subject} {snippet.lower()} {body.lower()[:1000]}"
+    
+    @staticmethod
+    def _live_categories(text: str) -> Tuple[str, ...]:
+        """Categories with a literal hint in the text; only these can match."""
+        return tuple(
+            cat for cat, hints in _CATEGORY_LITERAL_HINTS.items()
+            if any(h in text for h in hints)
+        )
+    
+    def _count_literals(self, text: str, live: Tuple[str, ...]) -> Counter:
+        """Count plain-keyword hits for the live categories."""
+        scores = Counter()
+        count = text.count
+        for cat in live:
+            # map/sum keep the per-keyword loop in C
+            scores[cat] += sum(map(count, self._literals[cat]))
+        return scores
+    
+    def _select(self, subject: str, scores: Counter) -> Dict:
+        """
+        Pick the event type from per-category hit counts.
+        
+        Args:
+            subject: Lowercased subject (for logging)
+            scores: Hit count per category
+        
+        Returns:
+            Result dictionary as documented on run()
+        """
+        # Running max over weighted scores in priority order; strict '>'
+        # keeps the earlier (higher-priority) category on ties
+        best = None
+        best_score = 0.0
+        indicators = []
+        for event, (status, multiplier) in CATEGORY_RESULTS.items():
+            score = scores[event]
+            if score > 0:
+                indicators.append(event)
+                weighted = score * multiplier
+                if weighted > best_score:
+                    best_score, best = weighted, (event, status)
         
         # Select best match
-        if results:
-            # Sort by score (descending)
-            results.sort(key=lambda x: x[2], reverse=True)
-            event_type, status_update, raw_score = results[0]
-            confidence = min(1.0, raw_score / 3.0)
-            
-            indicators = [r[0] for r in results]
+        if best:
+            event_type, status_update = best
+            confidence = min(1.0, best_score / 3.0)
         else:
             # Default to 'update'
             event_type = 'update'
             status_update = 'in_review'
             confidence = 0.3
-            indicators = []
         
-        logger.debug(f"Classified '{subject[:50]}...' as {event_type} (confidence: {confidence:.2f})")
+        logger.debug("Classified '%.50s...' as %s (confidence: %.2f)", subject, event_type, confidence)
         
         return {
             'event_type': event_type,
@@ -137,23 +305,3 @@ class ClassifyAgent:
             'confidence': confidence,
             'indicators': indicators
         }
-    
-    def _match_patterns(self, text: str, patterns: list) -> float:
-        """
-        Match patterns in text and return score.
-        
-        Args:
-            text: Text to search
-            patterns: List of regex patterns
-        
-        Returns:
-            Match score
-        """
-        score = 0.0
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, text, re.IGNORECASE)
-            if matches:
-                score += len(matches)
-        
-        return score
@@ -2,24 +2,236 @@
 ExtractAgent: Extracts structured information from job emails.
 Pulls company, role, dates, links, req_id, platform, etc.
 """
+import hashlib
+import os
 import re
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from functools import lru_cache
 from typing import Dict, Optional, List
 from urllib.parse import urlparse
 from dateutil import parser as date_parser
 
-from app.config import JOB_PLATFORMS
+from app.config import JOB_PLATFORMS, JOB_PLATFORM_RE
 from app.utils.text_clean import clean_company_name, extract_email_domain
 from app.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Compiled once at import; each helper walks these in priority order.
+# Captures are bounded ({1,199}) so a long whitespace run can't make the
+# lazy quantifier + trailing \s backtrack quadratically. A candidate whose
+# capture would be longer is skipped and search() moves on to a later
+# match, where an unbounded pattern stopped at it and failed the helper's
+# length check; the later, plausible match is the one used.
+_COMPANY_SUBJECT_PATTERNS = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'(?:thank\s+you\s+for\s+applying\s+(?:to|at)|thank\s+you\s+for\s+your\s+application\s+to|application\s+to)\s+([A-Z][A-Za-z0-9\s&\',.\-]{1,199}?)(?:\s*$|!)',
+    r'^([A-Z][A-Za-z0-9\s&\',.\-]{1,199}?)\s+[-–—]\s+',
+    r'^([A-Z][A-Za-z0-9\s&\',.\-]{1,199}?):\s+(?!Your|Application)',
+))
+
+_COMPANY_BODY_PATTERNS = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'on\s+behalf\s+of\s+([A-Z][A-Za-z0-9\s&\',.-]{1,199}?)(?:\.|,|\n)',
+    r'position\s+at\s+([A-Z][A-Za-z0-9\s&\',.-]{1,199}?)(?:\.|,|\n)',
+))
+
+_ROLE_SUBJECT_PATTERNS = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'(?:Your\s+[Aa]pplication\s+for)\s+([A-Z][A-Za-z0-9\s,/\-().&]{1,199}?)(?:\s*-|\s*$)',
+    r'^[^:]+:\s+([A-Z][A-Za-z0-9\s,/\-().&]{1,199}?)\s+(?:position|role)(?:\s+update|$)',
+    r'(?:position|role|job)(?:\s+as)?:\s+([A-Z][A-Za-z0-9\s,/\-().&]{1,199}?)(?:\s+at|update|\n|$)',
+    r'^[^:|-]{1,200}\s+[-|]\s+([A-Z][A-Za-z0-9\s,/\-().&]{1,199}?)$',
+))
+
+_ROLE_BODY_PATTERNS = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'(?:applied for|applying for|application for|position of|role of)\s+(?:the\s+)?([A-Z][A-Za-z0-9\s,/\-().&]{1,199}?)(?:\s+position|\s+role|\s+at|\.|,|\n)',
+    r'(?:position:|role:)\s+([A-Z][A-Za-z0-9\s,/\-().&]{1,199}?)(?:\n|\.|$)',
+    r'interest\s+in\s+(?:the\s+)?([A-Z][A-Za-z0-9\s,/\-().&]{1,199}?)\s+(?:position|role)',
+))
+
+_REQ_ID_PATTERNS = tuple(re.compile(p, re.IGNORECASE) for p in (
+    r'(?:requisition|req|job)\s*(?:(?:id|#|number):?\s*|:\s*)?([A-Z0-9\-]+)',  # one \s* per gap
+    r'(?:ID|#)\s*([A-Z0-9\-]{5,})',
+))
+
+_URL_RE = re.compile(r'https?://[^\s<>"{}|\\^`\[\]]+')
+
+# One scan for all three date shapes; the outer group name ("num", "mdy",
+# "dmy") tells _parse_date_match which sub-groups hold month/day/year.
+_MONTH_ALT = r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*'
+_DATE_RE = re.compile(
+    r'\b(?P<num>(?P<num_m>\d{1,2})[/-](?P<num_d>\d{1,2})[/-](?P<num_y>\d{2,4}))\b'
+    rf'|\b(?P<mdy>(?P<mdy_m>{_MONTH_ALT})\s+(?P<mdy_d>\d{{1,2}}),?\s+(?P<mdy_y>\d{{4}}))\b'
+    rf'|\b(?P<dmy>(?P<dmy_d>\d{{1,2}})\s+(?P<dmy_m>{_MONTH_ALT})\s+(?P<dmy_y>\d{{4}}))\b',
+    re.IGNORECASE
+)
+
+_MONTH_NAMES = (
+    'january', 'february', 'march', 'april', 'may', 'june',
+    'july', 'august', 'september', 'october', 'november', 'december',
+)
+_MONTHS = {name: i for i, name in enumerate(_MONTH_NAMES, 1)}
+_MONTHS.update({name[:3]: i for i, name in enumerate(_MONTH_NAMES, 1)})
+_MONTHS['sept'] = 9
+_MAX_DATES = 5  # key dates kept per email
+_RUN_CACHE_SIZE = 4096  # run_cached entries kept per agent
+
+_LOCATION_PATTERNS = tuple(re.compile(p) for p in (
+    r'(?:location|based in|office in):\s*([A-Z][A-Za-z\s,]{1,199}?)(?:\n|\.|\|)',
+    r'\b([A-Z][a-z]+,\s+[A-Z]{2})\b',  # City, STATE
+    r'\b([A-Z][a-z]+\s+[A-Z][a-z]+,\s+[A-Z]{2})\b',  # City Name, STATE
+))
+
+
+def _any_of(patterns: tuple) -> re.Pattern:
+    """Fuse same-flag patterns into one alternation that matches iff any does."""
+    return re.compile("|".join(f"(?:{p.pattern})" for p in patterns), patterns[0].flags)
+
+
+# The helpers must try each list in priority order (an earlier pattern wins
+# even when a later one matches further left), so the lists can't be
+# replaced by one alternation. The fused guards instead let a miss, the
+# common case, cost a single engine call instead of one per pattern.
+_COMPANY_SUBJECT_ANY = _any_of(_COMPANY_SUBJECT_PATTERNS)
+_COMPANY_BODY_ANY = _any_of(_COMPANY_BODY_PATTERNS)
+_ROLE_SUBJECT_ANY = _any_of(_ROLE_SUBJECT_PATTERNS)
+_ROLE_BODY_ANY = _any_of(_ROLE_BODY_PATTERNS)
+_REQ_ID_ANY = _any_of(_REQ_ID_PATTERNS)
+_LOCATION_ANY = _any_of(_LOCATION_PATTERNS)
+
+
+def _candidates(patterns: tuple, guard: re.Pattern, text: str) -> tuple:
+    """Patterns worth trying on text: none when the fused guard misses."""
+    return patterns if guard.search(text) else ()
+
+# Subject/sender cleanup used by _extract_company
+_YOUR_APPLICATION_RE = re.compile(r'^Your\s+Application\s+for', re.IGNORECASE)
+_COMPANY_NOISE_SUFFIX_RE = re.compile(r'\s+(Application|Team|Careers|Jobs|Recruiting)$', re.IGNORECASE)
+_BAD_COMPANY_PREFIXES = frozenset(('your', 'application', 'thank', 'position', 'role'))
+_SENDER_NAME_RE = re.compile(r'^([^<@]+)')
+_SENDER_VIA_RE = re.compile(r'\s+via\s+.+$', re.IGNORECASE)
+_SENDER_JOBS_RE = re.compile(r'\s+Jobs$', re.IGNORECASE)
+_SENDER_AT_RE = re.compile(r'\s+@\s+.*$')
+_SENDER_FROM_RE = re.compile(r'^.*?\s+from\s+', re.IGNORECASE)
+_SENDER_CORPORATE_RE = re.compile(r'\s+Corporate$', re.IGNORECASE)
+_BLOCK_SENDER_TOKENS = ('noreply', 'no-reply', 'donotreply', 'autoreply', 'system', 'notification', 'admin')
+_GENERIC_DOMAIN_NAMES = frozenset(('mail', 'email', 'noreply', 'support', 'info'))
+
+# Role cleanup used by _extract_role
+_ROLE_NOISE_SUFFIX_RE = re.compile(r'\s+(application|update|at|position|job|role|confirmation)$', re.IGNORECASE)
+_ARTICLE_PREFIX_RE = re.compile(r'^(the|a|an)\s+', re.IGNORECASE)
+_GENERIC_ROLE_RE = re.compile(r'^(applying|application|confirmation|update|career\s+match)$', re.IGNORECASE)
+_SINGLE_WORD_RE = re.compile(r'^[A-Z][a-z]+\s*$')
+_ROLE_BODY_SUFFIX_RE = re.compile(r'\s+(position|role|job)$', re.IGNORECASE)
+
+# (body mention, display name) pairs; display names are built once
+_PLATFORM_MENTIONS = tuple((p, sys.intern(p.title())) for p in (
+    'greenhouse', 'lever', 'workday', 'icims', 'smartrecruiters',
+))
+
+# Job keywords that mark a URL (found by _URL_RE) as an application portal
+_JOB_URL_KEYWORD_RE = re.compile(
+    r'greenhouse|lever|workday|icims|smartrecruiters|jobs|careers|apply|application|candidate',
+    re.IGNORECASE
+)
+_UTM_RE = re.compile(r'[?&]utm_[^&]*')
+
+_REMOTE_RE = re.compile(r'\b(remote|work from home)\b')  # matched on lowercased text
+
+
+def _is_capitalized_word(word: str) -> bool:
+    """True for an ASCII word like 'Jane': one capital, then lowercase letters."""
+    return (
+        len(word) > 1
+        and word.isascii()
+        and word.isalpha()
+        and word[0].isupper()
+        and word[1:].islower()
+    )
+
+
+def _is_person_name(name: str) -> bool:
+    """True for a 'First Last' style sender name."""
+    parts = name.split()
+    return len(parts) == 2 and all(_is_capitalized_word(part) for part in parts)
+
+
+def _parse_date_match(match: re.Match) -> Optional[str]:
+    """
+    Convert a _DATE_RE match to an ISO timestamp.
+    
+    Unambiguous shapes (4-digit year, known month name) are built directly;
+    anything else falls back to dateutil. 2-digit years are deliberately
+    left to dateutil: its century window differs from strptime's %y.
+    
+    Args:
+        match: Match object from _DATE_RE
+    
+    Returns:
+        ISO formatted date string or None if unparseable
+    """
+    kind = match.lastgroup
+    year = match.group(f'{kind}_y')
+    if len(year) == 4:
+        if kind == 'num':
+            month = int(match.group('num_m'))
+        else:
+            month = _MONTHS.get(match.group(f'{kind}_m').lower())
+        if month:
+            try:
+                return datetime(int(year), month, int(match.group(f'{kind}_d'))).isoformat()
+            except ValueError:
+                pass
+    
+    return _parse_date_fuzzy(match.group(kind))
+
+
+@lru_cache(maxsize=4096)
+def _parse_date_fuzzy(text: str) -> Optional[str]:
+    """
+    Parse a date string with dateutil's fuzzy parser (memoised).
+    
+    Args:
+        text: Raw date string
+    
+    Returns:
+        ISO formatted date string or None if unparseable
+    """
+    try:
+        return date_parser.parse(text, fuzzy=True).isoformat()
+    except Exception:
+        return None
+
+
+@lru_cache(maxsize=2048)
+def _clean_and_intern(company: str) -> str:
+    """
+    Clean a raw company name and intern the result.
+    
+    The same few hundred companies recur across an inbox, so repeated raw
+    names skip cleaning and all results share one string object.
+    
+    Args:
+        company: Raw company name
+    
+    Returns:
+        Cleaned, interned company name
+    """
+    return sys.intern(clean_company_name(company))
+
 
 class ExtractAgent:
     """Agent to extract structured data from job emails."""
     
     def __init__(self):
         self.job_platforms = JOB_PLATFORMS
+        
+        # Per-instance memo for run_cached (repeat/thread emails), keyed by
+        # a body digest so cached entries don't keep whole bodies alive
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
     
     def run(self, email_data: Dict) -> Dict:
         """
@@ -39,31 +251,80 @@ class ExtractAgent:
                 'location': Optional[str]
             }
         """
+        return self._run_impl(
+            email_data.get('subject', ''),
+            email_data.get('snippet', ''),
+            email_data.get('from', ''),
+            email_data.get('body', '')
+        )
+    
+    def run_cached(self, email_data: Dict) -> Dict:
+        """
+        Same as run(), memoised on (subject, snippet, from, body digest).
+        
+        The portal link and platform scans read the whole body, so the key
+        covers all of it, as a 16-byte blake2b digest rather than the text.
+        
+        Args:
+            email_data: Dictionary with 'subject', 'body', 'from', 'snippet'
+        
+        Returns:
+            Same dictionary as run() (a fresh copy per call)
+        """
         subject = email_data.get('subject', '')
-        body = email_data.get('body', '')
-        from_email = email_data.get('from', '')
         snippet = email_data.get('snippet', '')
+        from_email = email_data.get('from', '')
+        body = email_data.get('body', '')
+        key = (
+            subject,
+            snippet,
+            from_email,
+            hashlib.blake2b(body.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+        )
+        
+        with self._cache_lock:
+            result = self._cache.get(key)
+            if result is not None:
+                self._cache.move_to_end(key)
+        
+        if result is None:
+            result = self._run_impl(subject, snippet, from_email, body)
+            with self._cache_lock:
+                self._cache[key] = result
+                if len(self._cache) > _RUN_CACHE_SIZE:
+                    self._cache.popitem(last=False)
+        
+        return {**result, 'key_dates': list(result['key_dates'])}
+    
+    def _run_impl(self, subject: str, snippet: str, from_email: str, body: str) -> Dict:
+        """Extract from raw subject/snippet/sender/body strings."""
+        # Slice the body prefixes once; helpers only look at these
+        body_500 = body[:500]
+        body_800 = body[:800]
+        body_1k = body[:1000]
+        # Header-only fetches have no body: skip the body-only scans
+        have_body = bool(body)
         
         # Extract company
-        company = self._extract_company(subject, from_email, body)
+        company = self._extract_company(subject, from_email, body_500)
         
         # Extract role
-        role_title = self._extract_role(subject, body, snippet)
+        role_title = self._extract_role(subject, body_800, snippet, have_body)
         
         # Extract req_id
-        req_id = self._extract_req_id(subject, body)
+        req_id = self._extract_req_id(f"{subject} {body_1k}")
         
         # Extract platform
         platform = self._extract_platform(from_email, body)
         
         # Extract portal link
-        portal_link = self._extract_portal_link(body)
+        portal_link = self._extract_portal_link(body) if have_body else None
         
         # Extract dates
-        key_dates = self._extract_dates(body, snippet)
+        key_dates = self._extract_dates(f"{snippet} {body_1k}") if have_body or snippet else []
         
         # Extract location
-        location = self._extract_location(subject, body)
+        location = self._extract_location(f"{subject} {body_500}")
         
         result = {
             'company': company,
@@ -75,136 +336,114 @@ class ExtractAgent:
             'location': location
         }
         
-        logger.debug(f"Extracted: {company} - {role_title}")
+        logger.debug("Extracted: %s - %s", company, role_title)
         
         return result
     
-    def _extract_company(self, subject: str, from_email: str, body: str) -> str:
-        """Extract company name."""
+    def _extract_company(self, subject: str, from_email: str, body_500: str) -> str:
+        """Extract company name (body_500 is the first 500 chars of the body)."""
         # Skip subjects that start with "Your Application for" - extract from sender instead
-        if re.match(r'^Your\s+Application\s+for', subject, re.IGNORECASE):
+        if _YOUR_APPLICATION_RE.match(subject):
             # Jump to sender extraction
             pass
         else:
             # Try from subject patterns - more comprehensive
-            patterns = [
-                r'(?:thank\s+you\s+for\s+applying\s+(?:to|at)|thank\s+you\s+for\s+your\s+application\s+to|application\s+to)\s+([A-Z][A-Za-z0-9\s&\',.\-]+?)(?:\s*$|!)',
-                r'^([A-Z][A-Za-z0-9\s&\',.\-]+?)\s+[-–—]\s+',
-                r'^([A-Z][A-Za-z0-9\s&\',.\-]+?):\s+(?!Your|Application)',
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, subject, re.IGNORECASE)
+            for pattern in _candidates(_COMPANY_SUBJECT_PATTERNS, _COMPANY_SUBJECT_ANY, subject):
+                match = pattern.search(subject)
                 if match:
                     company = match.group(1).strip()
                     # Clean up common noise words
-                    company = re.sub(r'\s+(Application|Team|Careers|Jobs|Recruiting)$', '', company, flags=re.IGNORECASE)
+                    company = _COMPANY_NOISE_SUFFIX_RE.sub('', company)
                     # Skip if starts with common non-company words
-                    if re.match(r'^(Your|Application|Thank|Position|Role)\s+', company, re.IGNORECASE):
+                    first_word = company.split(None, 1)
+                    if len(first_word) == 2 and first_word[0].lower() in _BAD_COMPANY_PREFIXES:
                         continue
                     if len(company) > 2 and len(company) < 100:
-                        return clean_company_name(company)
+                        return _clean_and_intern(company)
         
         # Try from body (first 500 chars)
-        body_patterns = [
-            r'on\s+behalf\s+of\s+([A-Z][A-Za-z0-9\s&\',.-]+?)(?:\.|,|\n)',
-            r'position\s+at\s+([A-Z][A-Za-z0-9\s&\',.-]+?)(?:\.|,|\n)',
-        ]
-        
-        for pattern in body_patterns:
-            match = re.search(pattern, body[:500], re.IGNORECASE)
+        for pattern in _candidates(_COMPANY_BODY_PATTERNS, _COMPANY_BODY_ANY, body_500):
+            match = pattern.search(body_500)
             if match:
                 company = match.group(1).strip()
                 if len(company) > 2 and len(company) < 100:
-                    return clean_company_name(company)
+                    return _clean_and_intern(company)
         
         # Try from email sender name
-        sender_match = re.search(r'^([^<@]+)', from_email)
+        sender_match = _SENDER_NAME_RE.search(from_email)
         if sender_match:
             sender_name = sender_match.group(1).strip()
             # Remove "via" platforms and quotes
-            sender_name = re.sub(r'\s+via\s+.+$', '', sender_name, flags=re.IGNORECASE)
+            sender_name = _SENDER_VIA_RE.sub('', sender_name)
             sender_name = sender_name.replace('"', '').strip()
             
             # Remove common suffixes like "Jobs", "@ icims", "from X", etc.
-            sender_name = re.sub(r'\s+Jobs$', '', sender_name, flags=re.IGNORECASE)
-            sender_name = re.sub(r'\s+@\s+.*$', '', sender_name)
-            sender_name = re.sub(r'^.*?\s+from\s+', '', sender_name, flags=re.IGNORECASE)
-            sender_name = re.sub(r'\s+Corporate$', '', sender_name, flags=re.IGNORECASE)
+            sender_name = _SENDER_JOBS_RE.sub('', sender_name)
+            sender_name = _SENDER_AT_RE.sub('', sender_name)
+            sender_name = _SENDER_FROM_RE.sub('', sender_name)
+            sender_name = _SENDER_CORPORATE_RE.sub('', sender_name)
             
             # Skip if it's clearly a system/person name
-            if re.search(r'(noreply|no-reply|donotreply|autoreply|system|notification|admin)', sender_name, re.IGNORECASE):
+            sender_lower = sender_name.lower()
+            if any(token in sender_lower for token in _BLOCK_SENDER_TOKENS):
                 pass
-            elif re.search(r'^[A-Z][a-z]+\s+[A-Z][a-z]+$', sender_name):  # First Last name pattern
+            elif _is_person_name(sender_name):
                 pass
             else:
                 # If looks like company name
                 if len(sender_name) > 2 and len(sender_name) < 50:
-                    return clean_company_name(sender_name)
+                    return _clean_and_intern(sender_name)
         
         # Fallback: extract from email domain
         domain = extract_email_domain(from_email)
         if domain:
             # Remove common platform domains
-            for platform_domain in self.job_platforms.keys():
-                if platform_domain in domain:
-                    return "Unknown Company"
+            if JOB_PLATFORM_RE.search(domain):
+                return "Unknown Company"
             
             # Use domain as company (without TLD)
             company = domain.split('.')[0]
             # Skip generic domains
-            if company.lower() not in ['mail', 'email', 'noreply', 'support', 'info']:
-                return clean_company_name(company.replace('-', ' ').replace('_', ' '))
+            if company.lower() not in _GENERIC_DOMAIN_NAMES:
+                return _clean_and_intern(company.replace('-', ' ').replace('_', ' '))
         
         return "Unknown Company"
     
-    def _extract_role(self, subject: str, body: str, snippet: str) -> str:
-        """Extract role/position title."""
+    def _extract_role(self, subject: str, body_800: str, snippet: str, have_body: bool = True) -> str:
+        """Extract role/position title (body_800 is the first 800 chars of the body)."""
         # Try from subject patterns - more comprehensive
-        patterns = [
-            r'(?:Your\s+[Aa]pplication\s+for)\s+([A-Z][A-Za-z0-9\s,/\-().&]+?)(?:\s*-|\s*$)',
-            r'^[^:]+:\s+([A-Z][A-Za-z0-9\s,/\-().&]+?)\s+(?:position|role)(?:\s+update|$)',
-            r'(?:position|role|job)(?:\s+as)?:\s+([A-Z][A-Za-z0-9\s,/\-().&]+?)(?:\s+at|update|\n|$)',
-            r'^[^:|-]+\s+[-|]\s+([A-Z][A-Za-z0-9\s,/\-().&]+?)$',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, subject, re.IGNORECASE)
+        for pattern in _candidates(_ROLE_SUBJECT_PATTERNS, _ROLE_SUBJECT_ANY, subject):
+            match = pattern.search(subject)
             if match:
                 role = match.group(1).strip()
                 # Clean up common noise
-                role = re.sub(r'\s+(application|update|at|position|job|role|confirmation)$', '', role, flags=re.IGNORECASE)
-                role = re.sub(r'^(the|a|an)\s+', '', role, flags=re.IGNORECASE)
+                role = _ROLE_NOISE_SUFFIX_RE.sub('', role)
+                role = _ARTICLE_PREFIX_RE.sub('', role)
                 
                 # Skip generic phrases
-                if re.match(r'^(applying|application|confirmation|update|career\s+match)$', role, re.IGNORECASE):
+                if _GENERIC_ROLE_RE.match(role):
                     continue
                 
                 # Validate length and content
                 if len(role) > 3 and len(role) < 150:
                     # Skip if it's just company name-like or single word
-                    if not re.match(r'^[A-Z][a-z]+\s*$', role) and ' ' in role:
+                    if not _SINGLE_WORD_RE.match(role) and ' ' in role:
                         return role.strip()
         
         # Try from body (more patterns)
-        body_patterns = [
-            r'(?:applied for|applying for|application for|position of|role of)\s+(?:the\s+)?([A-Z][A-Za-z0-9\s,/\-().&]+?)(?:\s+position|\s+role|\s+at|\.|,|\n)',
-            r'(?:position:|role:)\s+([A-Z][A-Za-z0-9\s,/\-().&]+?)(?:\n|\.|$)',
-            r'interest\s+in\s+(?:the\s+)?([A-Z][A-Za-z0-9\s,/\-().&]+?)\s+(?:position|role)',
-        ]
-        
+        body_patterns = _candidates(_ROLE_BODY_PATTERNS, _ROLE_BODY_ANY, body_800) if have_body else ()
         for pattern in body_patterns:
-            match = re.search(pattern, body[:800], re.IGNORECASE)
+            match = pattern.search(body_800)
             if match:
                 role = match.group(1).strip()
-                role = re.sub(r'\s+(position|role|job)$', '', role, flags=re.IGNORECASE)
+                role = _ROLE_BODY_SUFFIX_RE.sub('', role)
                 if len(role) > 3 and len(role) < 150:
                     return role.strip()
         
         # Try from snippet
         if snippet:
-            for pattern in patterns:
-                match = re.search(pattern, snippet, re.IGNORECASE)
+            for pattern in _candidates(_ROLE_SUBJECT_PATTERNS, _ROLE_SUBJECT_ANY, snippet):
+                match = pattern.search(snippet)
                 if match:
                     role = match.group(1).strip()
                     if len(role) > 3 and len(role) < 150:
@@ -212,17 +451,10 @@ class ExtractAgent:
         
         return "Unknown Role"
     
-    def _extract_req_id(self, subject: str, body: str) -> Optional[str]:
-        """Extract requisition/job ID."""
-        patterns = [
-            r'(?:requisition|req|job)\s*(?:id|#|number)?:?\s*([A-Z0-9\-]+)',
-            r'(?:ID|#)\s*([A-Z0-9\-]{5,})',
-        ]
-        
-        combined = f"{subject} {body[:1000]}"
-        
-        for pattern in patterns:
-            match = re.search(pattern, combined, re.IGNORECASE)
+    def _extract_req_id(self, combined: str) -> Optional[str]:
+        """Extract requisition/job ID from subject + body prefix."""
+        for pattern in _candidates(_REQ_ID_PATTERNS, _REQ_ID_ANY, combined):
+            match = pattern.search(combined)
             if match:
                 return match.group(1).strip()
         
@@ -232,88 +464,104 @@ class ExtractAgent:
         """Extract job platform name."""
         domain = extract_email_domain(from_email)
         
-        if domain:
+        if domain and JOB_PLATFORM_RE.search(domain):
+            # First platform in JOB_PLATFORMS order wins
             for platform_domain, platform_name in self.job_platforms.items():
                 if platform_domain in domain:
                     return platform_name
         
         # Check body for platform mentions
-        platform_mentions = ['greenhouse', 'lever', 'workday', 'icims', 'smartrecruiters']
         body_lower = body.lower()
         
-        for platform in platform_mentions:
+        for platform, platform_name in _PLATFORM_MENTIONS:
             if platform in body_lower:
-                return platform.title()
+                return platform_name
         
         return None
     
     def _extract_portal_link(self, body: str) -> Optional[str]:
         """Extract application portal link."""
-        # Find URLs in body
-        url_pattern = r'https?://[^\s<>"{}|\\^`\[\]]+'
-        urls = re.findall(url_pattern, body)
-        
-        # Filter for job-related URLs
-        job_url_keywords = [
-            'greenhouse', 'lever', 'workday', 'icims', 'smartrecruiters',
-            'jobs', 'careers', 'apply', 'application', 'candidate'
-        ]
-        
-        for url in urls:
-            url_lower = url.lower()
-            for keyword in job_url_keywords:
-                if keyword in url_lower:
-                    # Clean URL (remove tracking params)
-                    clean_url = re.sub(r'[?&]utm_[^&]*', '', url)
-                    return clean_url
+        # Single pass over the body's URLs; only the chosen one is cleaned
+        first_url = None
+        for match in _URL_RE.finditer(body):
+            url = match.group(0)
+            if _JOB_URL_KEYWORD_RE.search(url):
+                # Clean URL (remove tracking params)
+                return _UTM_RE.sub('', url)
+            if first_url is None:
+                first_url = url
         
         # Return first URL if any
-        return urls[0] if urls else None
+        return first_url
     
-    def _extract_dates(self, body: str, snippet: str) -> List[str]:
-        """Extract key dates (interview times, deadlines)."""
-        dates = []
-        
-        # Look for date patterns
-        date_patterns = [
-            r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b',
-            r'\b(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{1,2},?\s+\d{4}\b',
-            r'\b\d{1,2}\s+(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\s+\d{4}\b',
-        ]
-        
-        combined = f"{snippet} {body[:1000]}"
-        
-        for pattern in date_patterns:
-            matches = re.findall(pattern, combined, re.IGNORECASE)
-            for match in matches:
-                try:
-                    parsed_date = date_parser.parse(match, fuzzy=True)
-                    dates.append(parsed_date.isoformat())
-                except Exception:
-                    pass
-        
-        return list(set(dates))[:5]  # Limit to 5 unique dates
+    def _extract_dates(self, combined: str) -> List[str]:
+        """Extract key dates (interview times, deadlines) from snippet + body prefix."""
+        # Insertion-ordered dedup; stop scanning once 5 unique dates are found
+        dates: Dict[str, None] = {}
+        seen_raw = set()
+        
+        for match in _DATE_RE.finditer(combined):
+            # Repeated mentions of the same date string are parsed once
+            raw = match.group(0)
+            if raw in seen_raw:
+                continue
+            seen_raw.add(raw)
+            
+            parsed_date = _parse_date_match(match)
+            if parsed_date and parsed_date not in dates:
+                dates[parsed_date] = None
+                if len(dates) == _MAX_DATES:
+                    break
+        
+        return list(dates)
     
-    def _extract_location(self, subject: str, body: str) -> Optional[str]:
-        """Extract job location."""
+    def _extract_location(self, combined: str) -> Optional[str]:
+        """Extract job location from subject + body prefix."""
         # Look for location patterns
-        patterns = [
-            r'(?:location|based in|office in):\s*([A-Z][A-Za-z\s,]+?)(?:\n|\.|\|)',
-            r'\b([A-Z][a-z]+,\s+[A-Z]{2})\b',  # City, STATE
-            r'\b([A-Z][a-z]+\s+[A-Z][a-z]+,\s+[A-Z]{2})\b',  # City Name, STATE
-        ]
-        
-        combined = f"{subject} {body[:500]}"
-        
-        for pattern in patterns:
-            match = re.search(pattern, combined)
+        for pattern in _candidates(_LOCATION_PATTERNS, _LOCATION_ANY, combined):
+            match = pattern.search(combined)
             if match:
                 location = match.group(1).strip()
                 if len(location) < 50:
-                    return location
+                    return sys.intern(location)
         
         # Check for remote
-        if re.search(r'\b(remote|work from home)\b', combined, re.IGNORECASE):
+        if _REMOTE_RE.search(combined.lower()):
             return "Remote"
         
         return None
+
+
+# Shared instance: the agent only holds immutable config, so one per process
+# is enough (worker processes build their own on import)
+EXTRACT_AGENT = ExtractAgent()
+
+# Below this many emails the process pool costs more than it saves
+_PARALLEL_MIN_BATCH = 64
+
+
+def _extract_one(email_data: Dict) -> Dict:
+    """Process-pool worker: run the worker's shared ExtractAgent."""
+    return EXTRACT_AGENT.run(email_data)
+
+
+def process_batch(emails: List[Dict], max_workers: Optional[int] = None) -> List[Dict]:
+    """
+    Extract structured data from many emails across CPU cores.
+    
+    Extraction is pure CPU work with no shared state, so emails are fanned
+    out to a process pool. Anything that writes to the database (e.g.
+    ResolveAgent) should run on the caller's side after this returns.
+    
+    Args:
+        emails: List of email dictionaries as accepted by ExtractAgent.run
+        max_workers: Worker processes (default: os.cpu_count())
+    
+    Returns:
+        List of extraction results, in input order
+    """
+    if len(emails) < _PARALLEL_MIN_BATCH:
+        return [EXTRACT_AGENT.run(email_data) for email_data in emails]
+    
+    with ProcessPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        return list(executor.map(_extract_one, emails, chunksize=32))
@@ -3,20 +3,81 @@ FilterAgent: Determines if an email is job-related or noise.
 Uses keyword matching and domain heuristics.
 """
 import re
-from typing import Dict
-from app.config import JOB_KEYWORDS, JOB_PLATFORMS
+from functools import lru_cache
+from itertools import islice
+from typing import Dict, Optional
+from app.config import JOB_KEYWORDS, JOB_KEYWORDS_LOWER, JOB_PLATFORMS, JOB_PLATFORM_RE
 from app.utils.text_clean import extract_email_domain
 from app.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
+# Job phrase patterns, each worth one keyword point (matched on lowercased text)
+_PHRASE_PATTERNS = tuple(re.compile(p) for p in (
+    r'application\s+(to|for|at)',
+    r'thank\s+you\s+for\s+(applying|your\s+application)',
+    r'interview\s+(invitation|scheduled|request)',
+    r'coding\s+(challenge|assessment|test)',
+    r'technical\s+(interview|assessment|challenge)',
+    r'position\s+at',
+    r'role\s+at',
+))
+
+# Common job-related domain fragments (ATS vendors not in JOB_PLATFORMS too)
+_JOB_DOMAIN_HINT_RE = re.compile('|'.join((
+    'greenhouse', 'lever', 'workday', 'icims', 'smartrecruiters',
+    'taleo', 'successfactors', 'jobvite', 'ashby', 'jazz',
+    'breezy', 'applytojob', 'myworkday', 'recruiting',
+)))
+
+# Literals that every keyword or phrase hit requires. Text containing none of
+# them scores zero on keywords, so non-job mail can skip the full scan.
+_PHRASE_ANCHORS = ('application', 'thank', 'interview', 'coding', 'technical', 'position', 'role')
+_FAST_NEG_PREFILTER = tuple(sorted(
+    anchor for anchor in JOB_KEYWORDS_LOWER.union(_PHRASE_ANCHORS)
+    # Drop anchors implied by a shorter one ('application received' -> 'application')
+    if not any(other != anchor and other in anchor
+               for other in JOB_KEYWORDS_LOWER.union(_PHRASE_ANCHORS))
+))
+
+_NO_INDICATORS_RESULT = {
+    'is_job_related': False,
+    'reason': "no job indicators found",
+    'confidence': 0.0
+}
+
+
+@lru_cache(maxsize=None)
+def _keyword_saturation(domain_score: float) -> int:
+    """
+    Keyword count beyond which the filter result can no longer change.
+    
+    At least 2 (the is_job_related threshold), and enough to saturate
+    confidence = min(1.0, domain_score * 0.6 + keywords * 0.1).
+    
+    Args:
+        domain_score: Score from _check_domain
+    
+    Returns:
+        Keyword count limit
+    """
+    count = 2
+    while domain_score * 0.6 + count * 0.1 < 1.0:
+        count += 1
+    return count
+
 
 class FilterAgent:
     """Agent to filter job-related emails from noise."""
     
     def __init__(self):
         self.job_keywords = JOB_KEYWORDS
+        # _check_keywords runs on lowercased text
+        self._keywords_lower = JOB_KEYWORDS_LOWER
         self.job_platforms = JOB_PLATFORMS
+        
+        # Per-instance memo for run_cached (templated platform emails)
+        self._run_cached = lru_cache(maxsize=4096)(self._run_impl)
     
     def run(self, email_data: Dict) -> Dict:
         """
@@ -32,20 +93,63 @@ class FilterAgent:
                 'confidence': float
             }
         """
-        subject = email_data.get('subject', '').lower()
-        from_email = email_data.get('from', '').lower()
-        body = email_data.get('body', '').lower()
-        snippet = email_data.get('snippet', '').lower()
+        return self._run_impl(
+            email_data.get('subject', ''),
+            extract_email_domain(email_data.get('from', '').lower()),
+            email_data.get('snippet', ''),
+            email_data.get('body', '')[:500]
+        )
+    
+    def run_cached(self, email_data: Dict) -> Dict:
+        """
+        Same as run(), memoised on (subject, sender domain, snippet, body prefix).
+        
+        Only the sender's domain and the first 500 chars of the body are
+        used, so platform emails sent from one template to many candidates
+        share a key and skip the keyword scan.
         
-        # Combined text for analysis
-        combined_text = f"{subject} {snippet} {body[:500]}"
+        Args:
+            email_data: Dictionary with 'subject', 'from', 'body', 'snippet'
+        
+        Returns:
+            Same dictionary as run() (a fresh copy per call)
+        """
+        return dict(self._run_cached(
+            email_data.get('subject', ''),
+            extract_email_domain(email_data.get('from', '').lower()),
+            email_data.get('snippet', ''),
+            email_data.get('body', '')[:500]
+        ))
+    
+    def _run_impl(self, subject: str, domain: Optional[str], snippet: str, body: str) -> Dict:
+        """
+        Shared implementation of run() and run_cached().
+        
+        Args:
+            subject: Email subject
+            domain: Sender domain (lowercase), if any
+            snippet: Gmail snippet
+            body: Body prefix (first 500 chars)
+        
+        Returns:
+            Filter result dictionary
+        """
+        subject = subject.lower()
+        snippet = snippet.lower()
+        
+        # Combined text for analysis; only the body prefix is lowercased
+        combined_text = f"{subject} {snippet} {body.lower()}"
         
         # Check sender domain
-        domain = extract_email_domain(from_email)
         domain_score = self._check_domain(domain)
         
-        # Check keywords
-        keyword_score = self._check_keywords(combined_text)
+        # Fast path: most inbox mail has no job indicators at all
+        if domain_score == 0 and not any(map(combined_text.__contains__, _FAST_NEG_PREFILTER)):
+            logger.debug("Filter result for '%.50s...': False (no job indicators found)", subject)
+            return dict(_NO_INDICATORS_RESULT)
+        
+        # Check keywords, stopping once more hits can't change the outcome
+        keyword_score = self._check_keywords(combined_text, _keyword_saturation(domain_score))
         
         # Determine if job-related
         is_job_related = domain_score > 0 or keyword_score >= 2
@@ -60,7 +164,7 @@ class FilterAgent:
         
         reason = "; ".join(reasons) if reasons else "no job indicators found"
         
-        logger.debug(f"Filter result for '{subject[:50]}...': {is_job_related} ({reason})")
+        logger.debug("Filter result for '%.50s...': %s (%s)", subject, is_job_related, reason)
         
         return {
             'is_job_related': is_job_related,
@@ -79,49 +183,39 @@ class FilterAgent:
             return 0.0
         
         # Exact match
-        for platform_domain in self.job_platforms.keys():
-            if platform_domain in domain:
-                return 1.0
+        if JOB_PLATFORM_RE.search(domain):
+            return 1.0
         
         # Common job-related domains
-        job_domains = [
-            'greenhouse', 'lever', 'workday', 'icims', 'smartrecruiters',
-            'taleo', 'successfactors', 'jobvite', 'ashby', 'jazz',
-            'breezy', 'applytojob', 'myworkday', 'recruiting'
-        ]
-        
-        for job_domain in job_domains:
-            if job_domain in domain:
-                return 0.8
+        if _JOB_DOMAIN_HINT_RE.search(domain):
+            return 0.8
         
         return 0.0
     
-    def _check_keywords(self, text: str) -> int:
+    def _check_keywords(self, text: str, limit: Optional[int] = None) -> int:
         """
         Count job-related keywords in text.
         
+        Args:
+            text: Lowercased text to scan
+            limit: Stop counting once this many hits are found
+        
         Returns:
-            Count of keywords found
+            Count of keywords found (at most limit)
         """
-        count = 0
-        
-        for keyword in self.job_keywords:
-            if keyword.lower() in text:
-                count += 1
+        # Lazily take hits until the limit is reached
+        hits = filter(None, map(text.__contains__, self._keywords_lower))
+        count = sum(1 for _ in islice(hits, limit))
+        if limit is not None and count >= limit:
+            return count
         
         # Additional patterns
-        patterns = [
-            r'application\s+(to|for|at)',
-            r'thank\s+you\s+for\s+(applying|your\s+application)',
-            r'interview\s+(invitation|scheduled|request)',
-            r'coding\s+(challenge|assessment|test)',
-            r'technical\s+(interview|assessment|challenge)',
-            r'position\s+at',
-            r'role\s+at',
-        ]
-        
-        for pattern in patterns:
-            if re.search(pattern, text, re.IGNORECASE):
-                count += 1
+        remaining = None if limit is None else limit - count
+        hits = filter(None, (pattern.search(text) for pattern in _PHRASE_PATTERNS))
+        count += sum(1 for _ in islice(hits, remaining))
         
         return count
+
+
+# Shared instance: the agent only holds immutable config
+FILTER_AGENT = FilterAgent()
@@ -2,19 +2,47 @@
 ResolveAgent: Matches emails to existing application records.
 Uses req_id, portal_link, and company/role similarity matching.
 """
-from typing import Dict, Optional
-from fuzzywuzzy import fuzz
+import string
+from typing import Dict, List, Optional, Tuple
+from rapidfuzz import fuzz
 
 from app.db.models import (
     find_applications_by_company_role,
+    find_applications_by_company_role_batch,
     find_applications_by_portal_link,
-    create_application
+    find_applications_by_portal_links,
+    create_application,
+    create_applications_batch
 )
 from app.utils.logger import setup_logger
 
 logger = setup_logger(__name__)
 
 
+def _ratio(a: str, b: str, score_cutoff: float = 0) -> int:
+    """
+    Similarity ratio (0-100) rounded like fuzzywuzzy's fuzz.ratio.
+    
+    Args:
+        a: First string
+        b: Second string
+        score_cutoff: Scores below this are returned as 0
+    
+    Returns:
+        Integer similarity score
+    """
+    return int(round(fuzz.ratio(a, b, score_cutoff=score_cutoff)))
+
+
+# SQLite's built-in LOWER() only folds ASCII letters
+_SQL_LOWER = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+
+def _sql_lower(text: str) -> str:
+    """Lowercase text the way SQLite's LOWER() does."""
+    return text.translate(_SQL_LOWER)
+
+
 class ResolveAgent:
     """Agent to resolve emails to application records."""
     
@@ -26,6 +54,10 @@ class ResolveAgent:
             similarity_threshold: Minimum fuzzy match score (0-100) for company/role matching
         """
         self.similarity_threshold = similarity_threshold
+        # A pair can only reach the threshold if each score is at least
+        # 2*threshold - 100 (the other is at most 100); lower ones are cut
+        # off inside rapidfuzz. One point of slack covers rounding.
+        self._score_cutoff = max(0, 2 * similarity_threshold - 101)
     
     def run(self, extracted_data: Dict) -> Dict:
         """
@@ -52,7 +84,7 @@ class ResolveAgent:
             matches = find_applications_by_portal_link(portal_link)
             if matches:
                 app_id = matches[0]['application_id']
-                logger.info(f"Matched to application {app_id} via portal_link")
+                logger.info("Matched to application %s via portal_link", app_id)
                 return {
                     'application_id': app_id,
                     'is_new': False,
@@ -61,42 +93,20 @@ class ResolveAgent:
         
         # Strategy 2: Match by company + role (fuzzy)
         matches = find_applications_by_company_role(company, role_title)
+        best_match, best_score = self._best_fuzzy_match(company, role_title, matches)
         
-        if matches:
-            # Check similarity
-            best_match = None
-            best_score = 0
-            
-            for match in matches:
-                # Calculate similarity
-                company_score = fuzz.ratio(
-                    company.lower(),
-                    match['company'].lower()
-                )
-                role_score = fuzz.ratio(
-                    role_title.lower(),
-                    match['role_title'].lower()
-                )
-                
-                # Combined score
-                combined_score = (company_score + role_score) / 2
-                
-                if combined_score > best_score:
-                    best_score = combined_score
-                    best_match = match
-            
-            # If good match found
-            if best_score >= self.similarity_threshold:
-                app_id = best_match['application_id']
-                logger.info(f"Matched to application {app_id} via fuzzy matching (score: {best_score:.1f})")
-                return {
-                    'application_id': app_id,
-                    'is_new': False,
-                    'match_method': f'fuzzy_match_{best_score:.0f}'
-                }
+        # If good match found
+        if best_match is not None and best_score >= self.similarity_threshold:
+            app_id = best_match['application_id']
+            logger.info("Matched to application %s via fuzzy matching (score: %.1f)", app_id, best_score)
+            return {
+                'application_id': app_id,
+                'is_new': False,
+                'match_method': f'fuzzy_match_{best_score:.0f}'
+            }
         
         # Strategy 3: Create new application
-        logger.info(f"Creating new application: {company} - {role_title}")
+        logger.info("Creating new application: %s - %s", company, role_title)
         
         app_id = create_application(
             company=company,
@@ -111,3 +121,133 @@ class ResolveAgent:
             'is_new': True,
             'match_method': 'created_new'
         }
+    
+    def run_batch(self, extracted_list: List[Dict]) -> List[Dict]:
+        """
+        Resolve many emails with batched database lookups.
+        
+        Portal links and company/role candidates for the whole batch are
+        fetched up front (one query per chunk instead of one per email),
+        and new applications are inserted together at the end. Emails that
+        match an application created earlier in the same batch resolve to
+        it, as they would have when run() was called one email at a time.
+        
+        Args:
+            extracted_list: List of ExtractAgent outputs
+        
+        Returns:
+            List of run() result dictionaries, in input order
+        """
+        items = [
+            (
+                data.get('company', 'Unknown Company'),
+                data.get('role_title', 'Unknown Role'),
+                data.get('portal_link'),
+                data.get('platform')
+            )
+            for data in extracted_list
+        ]
+        
+        by_link = find_applications_by_portal_links([link for _, _, link, _ in items if link])
+        candidates = find_applications_by_company_role_batch([(company, role) for company, role, _, _ in items])
+        
+        results = [None] * len(items)
+        new_apps = []     # applications to create, in batch order
+        new_by_link = {}  # portal_link -> index into new_apps
+        new_by_key = {}   # (company, role) as SQL LOWER() sees them -> indices
+        pending = []      # (item index, new_apps index, match_method, is_new)
+        
+        for i, (company, role_title, portal_link, platform) in enumerate(items):
+            # Strategy 1: Match by portal_link (existing, then created in batch)
+            if portal_link and portal_link in by_link:
+                app_id = by_link[portal_link][0]['application_id']
+                logger.info("Matched to application %s via portal_link", app_id)
+                results[i] = {
+                    'application_id': app_id,
+                    'is_new': False,
+                    'match_method': 'portal_link'
+                }
+                continue
+            if portal_link and portal_link in new_by_link:
+                pending.append((i, new_by_link[portal_link], 'portal_link', False))
+                continue
+            
+            # Strategy 2: Match by company + role (fuzzy); batch-created
+            # applications are the newest, so they come first
+            key = (_sql_lower(company), _sql_lower(role_title))
+            in_batch = [new_apps[j] for j in reversed(new_by_key.get(key, []))]
+            best_match, best_score = self._best_fuzzy_match(
+                company, role_title, in_batch + candidates[i]
+            )
+            if best_match is not None and best_score >= self.similarity_threshold:
+                method = f'fuzzy_match_{best_score:.0f}'
+                if 'application_id' in best_match:
+                    app_id = best_match['application_id']
+                    logger.info("Matched to application %s via fuzzy matching (score: %.1f)", app_id, best_score)
+                    results[i] = {
+                        'application_id': app_id,
+                        'is_new': False,
+                        'match_method': method
+                    }
+                else:
+                    pending.append((i, best_match['batch_idx'], method, False))
+                continue
+            
+            # Strategy 3: Create new application (inserted below)
+            logger.info("Creating new application: %s - %s", company, role_title)
+            j = len(new_apps)
+            new_apps.append({
+                'company': company,
+                'role_title': role_title,
+                'platform': platform,
+                'portal_link': portal_link,
+                'status': 'applied',
+                'batch_idx': j
+            })
+            new_by_key.setdefault(key, []).append(j)
+            if portal_link:
+                new_by_link.setdefault(portal_link, j)
+            pending.append((i, j, 'created_new', True))
+        
+        app_ids = create_applications_batch(new_apps)
+        for i, j, method, is_new in pending:
+            results[i] = {
+                'application_id': app_ids[j],
+                'is_new': is_new,
+                'match_method': method
+            }
+        
+        return results
+    
+    def _best_fuzzy_match(self, company: str, role_title: str, matches: List[Dict]) -> Tuple[Optional[Dict], float]:
+        """
+        Pick the candidate with the highest combined company/role similarity.
+        
+        Args:
+            company: Extracted company name
+            role_title: Extracted role title
+            matches: Candidate application dicts (ties go to the earliest)
+        
+        Returns:
+            (best candidate or None, combined score 0-100)
+        """
+        best_match = None
+        best_score = 0
+        company_lower = company.lower()
+        role_lower = role_title.lower()
+        
+        for match in matches:
+            # Calculate similarity
+            company_score = _ratio(company_lower, match['company'].lower(), self._score_cutoff)
+            if self._score_cutoff and not company_score:
+                continue  # can't reach the threshold
+            role_score = _ratio(role_lower, match['role_title'].lower(), self._score_cutoff)
+            
+            # Combined score
+            combined_score = (company_score + role_score) / 2
+            
+            if combined_score > best_score:
+                best_score = combined_score
+                best_match = match
+        
+        return best_match, best_score
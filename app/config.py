@@ -3,11 +3,21 @@ Configuration management for Job Application Tracker.
 Loads environment variables and validates configuration.
 """
 import os
+import re
+from functools import lru_cache
 from pathlib import Path
 from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+
+@lru_cache(maxsize=None)
+def _ensure_env_loaded() -> bool:
+    """Load .env into the environment (only the first call does any work)."""
+    load_dotenv()
+    return True
+
+
+# Load environment variables (before the env-derived settings below)
+_ensure_env_loaded()
 
 # Project paths
 PROJECT_ROOT = Path(__file__).parent.parent
@@ -24,6 +34,10 @@ GMAIL_SCOPES = ['https://www.googleapis.com/auth/gmail.readonly']
 
 # Polling Configuration
 POLL_INTERVAL_SECONDS = int(os.getenv("POLL_INTERVAL_SECONDS", "120"))
+# Idle cycles double the interval up to this
+POLL_MAX_INTERVAL_SECONDS = int(os.getenv("POLL_MAX_INTERVAL_SECONDS", "960"))
+# Upper bound on messages one polling cycle searches for (e.g. first run)
+POLL_MAX_MESSAGES = int(os.getenv("POLL_MAX_MESSAGES", "2000"))
 
 # Database Configuration
 DB_PATH = os.getenv("DB_PATH", "./job_applications.db")
@@ -69,6 +83,11 @@ JOB_PLATFORMS = {
     "jazz.co": "JazzHR",
 }
 
+# Platform domains as one alternation, so "is any platform domain in this
+# sender domain?" is a single C-level search instead of a Python loop
+JOB_PLATFORM_DOMAINS = tuple(JOB_PLATFORMS)
+JOB_PLATFORM_RE = re.compile("|".join(map(re.escape, JOB_PLATFORM_DOMAINS)))
+
 # Job-related keywords for filtering
 JOB_KEYWORDS = [
     "application",
@@ -93,12 +112,22 @@ JOB_KEYWORDS = [
     "declined",
 ]
 
+# Lowercased once at import for case-insensitive substring checks
+JOB_KEYWORDS_LOWER = frozenset(k.lower() for k in JOB_KEYWORDS)
+
+
+@lru_cache(maxsize=None)
+def _credentials_exist() -> bool:
+    """Check for the Google client secret file (once per process)."""
+    return Path(GOOGLE_CLIENT_SECRET_PATH).is_file()
+
 
 def validate_config():
     """Validate that required configuration is present."""
+    _ensure_env_loaded()
     errors = []
     
-    if not os.path.exists(GOOGLE_CLIENT_SECRET_PATH):
+    if not _credentials_exist():
         errors.append(f"Google client secret file not found: {GOOGLE_CLIENT_SECRET_PATH}")
     
     if POLL_INTERVAL_SECONDS < 60:
@@ -6,7 +6,7 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from datetime import datetime, timedelta
+import os
 import sys
 from pathlib import Path
 
@@ -14,11 +14,11 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from app.db.models import (
-    get_all_applications,
-    get_recent_events,
-    get_status_counts,
-    get_event_type_counts,
-    get_applications_by_date_range
+    get_all_applications_df,
+    get_recent_events_for_display,
+    get_applications_by_date_range,
+    get_applications_per_day,
+    get_dashboard_snapshot
 )
 from app.config import DB_PATH
 
@@ -49,48 +49,73 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-def load_data():
-    """Load data from database."""
-    applications = get_all_applications()
-    events = get_recent_events(limit=200)
-    status_counts = get_status_counts()
-    event_counts = get_event_type_counts()
-    
-    return applications, events, status_counts, event_counts
+def get_db_mtime():
+    """DB modification time, used to key the cached loaders."""
+    # In WAL mode commits land in the -wal file until a checkpoint
+    mtime = 0.0
+    for path in (DB_PATH, f"{DB_PATH}-wal"):
+        try:
+            mtime = max(mtime, os.path.getmtime(path))
+        except OSError:
+            pass
+    return mtime
+
+
+def as_categories(df, columns):
+    """Store low-cardinality string columns as pandas categoricals."""
+    for column in columns:
+        df[column] = df[column].astype('category')
+    return df
+
+
+# Cached loaders: reruns reuse results until the DB file changes (or 60s pass)
+@st.cache_data(ttl=60, show_spinner=False)
+def load_applications(db_mtime):
+    """Load all applications (DataFrame)."""
+    return as_categories(get_all_applications_df(), ['company', 'status', 'platform'])
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_events(db_mtime, limit=200):
+    """Load recent events (DataFrame of display columns)."""
+    return as_categories(get_recent_events_for_display(limit=limit), ['event_type', 'company'])
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_snapshot(db_mtime, days=30):
+    """Load status/event counts and KPI counts (one query)."""
+    return get_dashboard_snapshot(days=days)
+
+
+@st.cache_data(ttl=60, show_spinner=False)
+def load_applications_per_day(db_mtime, days=30):
+    """Load per-day application counts for the chosen time range."""
+    return get_applications_per_day(days=days)
 
 
-def calculate_kpis(applications, events):
-    """Calculate key performance indicators."""
-    now = datetime.utcnow()
-    thirty_days_ago = now - timedelta(days=30)
+def load_data(db_mtime):
+    """Load data from database (through the cached loaders)."""
+    applications = load_applications(db_mtime)
+    snapshot = load_snapshot(db_mtime)
     
-    # Total applications (last 30 days)
-    recent_apps = [
-        app for app in applications
-        if datetime.fromisoformat(app['first_seen_date']) > thirty_days_ago
-    ]
-    total_recent = len(recent_apps)
+    return applications, snapshot
+
+
+def calculate_kpis(snapshot):
+    """Calculate key performance indicators from the dashboard snapshot."""
+    status_counts = snapshot['status_counts']
     
     # Active pipeline (not rejected/offer)
     active_statuses = ['applied', 'in_review', 'assessment', 'interview']
-    active_count = sum(1 for app in applications if app['status'] in active_statuses)
-    
-    # Interviews scheduled
-    interview_count = sum(1 for app in applications if app['status'] == 'interview')
-    
-    # Rejections
-    rejection_count = sum(1 for app in applications if app['status'] == 'rejected')
-    
-    # Response rate (events excluding confirmations / total applications)
-    non_confirmation_events = [e for e in events if e['event_type'] != 'confirmation']
-    response_rate = len(non_confirmation_events) / max(len(applications), 1) * 100
+    active_count = sum(status_counts.get(status, 0) for status in active_statuses)
     
     return {
-        'total_recent': total_recent,
+        'total_recent': snapshot['total_recent'],
         'active_count': active_count,
-        'interview_count': interview_count,
-        'rejection_count': rejection_count,
-        'response_rate': response_rate
+        'interview_count': status_counts.get('interview', 0),
+        'rejection_count': status_counts.get('rejected', 0),
+        # Events excluding confirmations / total applications, computed in SQL
+        'response_rate': snapshot['response_rate']
     }
 
 
@@ -134,31 +159,18 @@ def render_kpis(kpis):
         )
 
 
-def plot_applications_over_time(applications):
-    """Plot applications over time."""
-    if not applications:
+def plot_applications_over_time(dates, counts):
+    """Plot applications over time (per-day counts grouped in SQL)."""
+    if not dates:
         st.info("No applications to display")
         return
     
-    # Convert to DataFrame
-    df = pd.DataFrame(applications)
-    df['first_seen_date'] = pd.to_datetime(df['first_seen_date'], errors='coerce')
-    df = df.dropna(subset=['first_seen_date'])  # Remove rows with invalid dates
-    if df.empty:
-        st.info("No valid application dates to display")
-        return
-    df['date'] = df['first_seen_date'].dt.date
-    
-    # Count by date
-    date_counts = df.groupby('date').size().reset_index(name='count')
-    
     # Create line chart
     fig = px.line(
-        date_counts,
-        x='date',
-        y='count',
+        x=dates,
+        y=counts,
         title='Applications Over Time',
-        labels={'date': 'Date', 'count': 'Number of Applications'}
+        labels={'x': 'Date', 'y': 'Number of Applications'}
     )
     
     fig.update_traces(mode='lines+markers')
@@ -193,23 +205,16 @@ def plot_status_distribution(status_counts):
     st.plotly_chart(fig, use_container_width=True)
 
 
-def plot_funnel(applications, events):
+def plot_funnel(status_counts):
     """Plot application funnel."""
-    # Calculate funnel stages
-    total_apps = len(applications)
-    
-    # Count by status
+    # Funnel stages come straight from the (cached) status counts
     status_order = ['applied', 'in_review', 'assessment', 'interview', 'offer']
-    status_counts = {}
-    
-    for status in status_order:
-        count = sum(1 for app in applications if app['status'] == status)
-        status_counts[status] = count
+    values = [status_counts.get(status, 0) for status in status_order]
     
     # Create funnel
     fig = go.Figure(go.Funnel(
-        y=list(status_counts.keys()),
-        x=list(status_counts.values()),
+        y=status_order,
+        x=values,
         textinfo="value+percent initial"
     ))
     
@@ -220,30 +225,16 @@ def plot_funnel(applications, events):
 
 def render_recent_events(events):
     """Render recent events table."""
-    if not events:
+    if events.empty:
         st.info("No events to display")
         return
     
-    # Convert to DataFrame
-    df = pd.DataFrame(events)
-    
-    # Select and rename columns
-    display_df = df[[
-        'event_time', 'company', 'role_title', 'event_type',
-        'subject', 'confidence', 'action_suggestion'
-    ]].copy()
-    
-    display_df['event_time'] = pd.to_datetime(display_df['event_time'], errors='coerce')
-    display_df = display_df.dropna(subset=['event_time'])  # Remove rows with invalid times
-    display_df = display_df.sort_values('event_time', ascending=False)
-    
-    # Format datetime using apply instead of .dt accessor
-    display_df['event_time'] = display_df['event_time'].apply(
-        lambda x: x.strftime('%Y-%m-%d %H:%M') if pd.notna(x) else ''
-    )
+    # Columns are selected, filtered, sorted and formatted in SQL; st.cache_data
+    # hands out a fresh copy per call, so the frame can be edited in place
+    display_df = events
     
-    # Format confidence
-    display_df['confidence'] = display_df['confidence'].apply(lambda x: f"{x:.2f}" if pd.notna(x) else "0.00")
+    # Format confidence (missing values show as 0.00)
+    display_df['confidence'] = display_df['confidence'].fillna(0.0).map("{:.2f}".format)
     
     # Rename columns
     display_df.columns = [
@@ -256,32 +247,17 @@ def render_recent_events(events):
 
 def render_applications_table(applications):
     """Render applications table."""
-    if not applications:
+    if applications.empty:
         st.info("No applications to display")
         return
     
-    # Convert to DataFrame
-    df = pd.DataFrame(applications)
-    
     # Select columns
-    display_df = df[[
+    display_df = applications[[
         'application_id', 'company', 'role_title', 'status',
         'platform', 'first_seen_date', 'last_updated'
     ]].copy()
     
-    # Format dates - handle both datetime objects and strings
-    display_df['first_seen_date'] = pd.to_datetime(display_df['first_seen_date'], errors='coerce')
-    display_df['last_updated'] = pd.to_datetime(display_df['last_updated'], errors='coerce')
-    
-    # Now safe to use .dt accessor
-    display_df['first_seen_date'] = display_df['first_seen_date'].apply(
-        lambda x: x.strftime('%Y-%m-%d') if pd.notna(x) else ''
-    )
-    display_df['last_updated'] = display_df['last_updated'].apply(
-        lambda x: x.strftime('%Y-%m-%d %H:%M') if pd.notna(x) else ''
-    )
-    
-    # Rename columns
+    # Rename columns (dates are already formatted by the query)
     display_df.columns = [
         'ID', 'Company', 'Role', 'Status',
         'Platform', 'First Seen', 'Last Updated'
@@ -290,6 +266,19 @@ def render_applications_table(applications):
     st.dataframe(display_df, use_container_width=True, height=400)
 
 
+def render_live_kpis():
+    """KPI section; loads its own data so it can refresh as a fragment."""
+    kpis = calculate_kpis(load_snapshot(get_db_mtime()))
+    
+    st.subheader("📊 Key Metrics")
+    render_kpis(kpis)
+
+
+def render_live_events():
+    """Recent events table; loads its own data so it can refresh as a fragment."""
+    render_recent_events(load_events(get_db_mtime()))
+
+
 def main():
     """Main dashboard function."""
     # Header
@@ -302,6 +291,7 @@ def main():
         
         # Refresh button
         if st.button("🔄 Refresh Data"):
+            st.cache_data.clear()
             st.rerun()
         
         # Auto-refresh toggle
@@ -326,16 +316,17 @@ def main():
         st.subheader("Database")
         st.text(f"Path: {DB_PATH}")
     
+    # With auto-refresh on, only the KPI and recent-events fragments re-run
+    refresh_every = 60 if auto_refresh else None
+    
     # Load data
     try:
-        applications, events, status_counts, event_counts = load_data()
-        
-        # Calculate KPIs
-        kpis = calculate_kpis(applications, events)
+        db_mtime = get_db_mtime()
+        applications, snapshot = load_data(db_mtime)
+        status_counts = snapshot['status_counts']
         
         # Render KPIs
-        st.subheader("📊 Key Metrics")
-        render_kpis(kpis)
+        st.fragment(run_every=refresh_every)(render_live_kpis)()
         
         st.markdown("---")
         
@@ -343,13 +334,13 @@ def main():
         col1, col2 = st.columns(2)
         
         with col1:
-            plot_applications_over_time(applications)
+            plot_applications_over_time(*load_applications_per_day(db_mtime, days_filter))
         
         with col2:
             plot_status_distribution(status_counts)
         
         # Funnel
-        plot_funnel(applications, events)
+        plot_funnel(status_counts)
         
         st.markdown("---")
         
@@ -358,7 +349,7 @@ def main():
         
         with tab1:
             st.subheader("📧 Recent Events")
-            render_recent_events(events)
+            st.fragment(run_every=refresh_every)(render_live_events)()
         
         with tab2:
             st.subheader("📋 All Applications")
@@ -367,12 +358,6 @@ def main():
     except Exception as e:
         st.error(f"Error loading data: {e}")
         st.info("Make sure the database has been initialized. Run: `python -m app.db.init_db`")
-    
-    # Auto-refresh
-    if auto_refresh:
-        import time
-        time.sleep(60)
-        st.rerun()
 
 
 if __name__ == "__main__":
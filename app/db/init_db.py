@@ -11,6 +11,97 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 
 from app.config import DB_PATH
+from app.utils.logger import setup_logger
+
+logger = setup_logger(__name__)
+
+# Stored in PRAGMA user_version; bump when migrate_schema gains a step
+SCHEMA_VERSION = 2
+
+# Schema objects create_tables makes; if all exist the DDL is skipped
+_EXPECTED_SCHEMA = (
+    ('table', 'applications'),
+    ('table', 'events'),
+    ('table', 'emails_processed'),
+    ('table', 'system_state'),
+    ('index', 'idx_applications_status'),
+    ('index', 'idx_applications_last_updated'),
+    ('index', 'idx_applications_first_seen'),
+    ('index', 'idx_applications_company_role'),
+    ('index', 'idx_events_application_id'),
+    ('index', 'idx_events_time_app'),
+    ('index', 'idx_emails_processed_received_at'),
+    ('index', 'idx_emails_processed_content_key'),
+)
+
+
+# Also run by migrate_schema, for databases created before the column existed
+_CONTENT_KEY_INDEX_SQL = """
+    CREATE INDEX IF NOT EXISTS idx_emails_processed_content_key 
+    ON emails_processed(content_key)
+"""
+
+
+def _schema_is_current(cursor) -> bool:
+    """Check sqlite_master for every table and index create_tables makes."""
+    cursor.execute("SELECT type, name FROM sqlite_master WHERE type IN ('table', 'index')")
+    existing = set(cursor.fetchall())
+    return all(obj in existing for obj in _EXPECTED_SCHEMA)
+
+
+def migrate_schema(conn):
+    """
+    Upgrade an existing database in place to SCHEMA_VERSION.
+    
+    Version 1: applications.first_seen_date holds unix seconds (UTC)
+    instead of an ISO datetime string (last_updated's, or 0, when the
+    string can't be parsed).
+    Version 2: emails_processed.content_key (indexed) for content dedup.
+    
+    Args:
+        conn: Open sqlite3 connection
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= SCHEMA_VERSION:
+        return
+    
+    has_applications = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'applications'"
+    ).fetchone()
+    
+    if version < 1 and has_applications:
+        conn.execute("""
+            UPDATE applications
+            SET first_seen_date = CAST(strftime('%s', first_seen_date) AS INTEGER)
+            WHERE typeof(first_seen_date) = 'text'
+            AND strftime('%s', first_seen_date) IS NOT NULL
+        """)
+        
+        # Unparseable strings would sort after every integer (and so count
+        # as recent); use last_updated instead, or 0 if that fails too
+        coerced = conn.execute("""
+            UPDATE applications
+            SET first_seen_date = COALESCE(CAST(strftime('%s', last_updated) AS INTEGER), 0)
+            WHERE typeof(first_seen_date) = 'text'
+        """).rowcount
+        if coerced:
+            logger.warning(
+                "%s applications had an unparseable first_seen_date; set from last_updated",
+                coerced
+            )
+    
+    has_emails_processed = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'emails_processed'"
+    ).fetchone()
+    
+    if version < 2 and has_emails_processed:
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(emails_processed)")}
+        if 'content_key' not in columns:
+            conn.execute("ALTER TABLE emails_processed ADD COLUMN content_key BLOB")
+        conn.execute(_CONTENT_KEY_INDEX_SQL)
+    
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    conn.commit()
 
 
 def create_tables(db_path=None):
@@ -21,6 +112,17 @@ def create_tables(db_path=None):
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
+    migrate_schema(conn)
+    
+    # Fast path: nothing to create on an already-initialized database
+    if _schema_is_current(cursor):
+        conn.close()
+        print(f"✓ Database already initialized at {db_path}")
+        return
+    
+    # WAL persists in the file: dashboard reads no longer block the poller's writes
+    cursor.execute("PRAGMA journal_mode=WAL")
+    
     # Applications table
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS applications (
@@ -30,7 +132,7 @@ def create_tables(db_path=None):
             platform TEXT,
             source TEXT,
             applied_date DATETIME,
-            first_seen_date DATETIME NOT NULL,
+            first_seen_date INTEGER NOT NULL,  -- unix seconds (UTC)
             status TEXT NOT NULL DEFAULT 'applied',
             last_updated DATETIME NOT NULL,
             portal_link TEXT,
@@ -57,7 +159,7 @@ def create_tables(db_path=None):
         )
     """)
     
-    # Emails processed table
+    # Emails processed table (clustered on the message id it is looked up by)
     cursor.execute("""
         CREATE TABLE IF NOT EXISTS emails_processed (
             email_message_id TEXT PRIMARY KEY,
@@ -66,8 +168,9 @@ def create_tables(db_path=None):
             from_domain TEXT,
             subject TEXT,
             classification TEXT,
-            processed_at DATETIME NOT NULL
-        )
+            processed_at DATETIME NOT NULL,
+            content_key BLOB  -- fingerprint of sender/subject/body (dedupe.content_key)
+        ) WITHOUT ROWID
     """)
     
     # System state table
@@ -101,15 +204,33 @@ def create_tables(db_path=None):
     """)
     
     cursor.execute("""
-        CREATE INDEX IF NOT EXISTS idx_events_event_time 
-        ON events(event_time DESC)
+        CREATE INDEX IF NOT EXISTS idx_applications_first_seen 
+        ON applications(first_seen_date DESC)
     """)
     
+    # ResolveAgent's case-insensitive company/role candidate lookup (the
+    # expressions must match the queries' LOWER() calls)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_applications_company_role 
+        ON applications(LOWER(company), LOWER(role_title))
+    """)
+    
+    # Recent events join: covers both the ORDER BY and the join key
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_events_time_app 
+        ON events(event_time DESC, application_id)
+    """)
+    
+    # Superseded by idx_events_time_app
+    cursor.execute("DROP INDEX IF EXISTS idx_events_event_time")
+    
     cursor.execute("""
         CREATE INDEX IF NOT EXISTS idx_emails_processed_received_at 
         ON emails_processed(received_at DESC)
     """)
     
+    cursor.execute(_CONTENT_KEY_INDEX_SQL)
+    
     conn.commit()
     conn.close()
     
@@ -2,27 +2,149 @@
 Database models and query helpers for Job Application Tracker.
 Provides clean interface for database operations.
 """
+import atexit
+import calendar
 import sqlite3
 import json
-from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+import threading
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import List, Dict, Optional, Set, Tuple
 from contextlib import contextmanager
 
 from app.config import DB_PATH
+from app.db.init_db import migrate_schema
+
+# Rows per batched query; keeps bound parameters under SQLite's
+# 999-variable default limit
+_BATCH_CHUNK = 300
+
+
+# Serializes use of the shared connections across threads (dashboard
+# sessions, poller workers); re-entrant so helpers can nest
+_conn_lock = threading.RLock()
+
+# Open transaction() blocks; only touched while holding _conn_lock
+_txn_depth = 0
+
+
+def _rows_to_df(cursor):
+    """
+    Build a DataFrame from an executed cursor's remaining rows.
+    
+    Rows are fetched as plain tuples and handed to from_records, skipping
+    read_sql_query's per-column conversion pass.
+    
+    Args:
+        cursor: Cursor with a pending result set
+    
+    Returns:
+        pandas DataFrame with the result columns
+    """
+    # Imported here so the poller doesn't pay for pandas
+    import pandas as pd
+    
+    return pd.DataFrame.from_records(
+        cursor.fetchall(),
+        columns=[column[0] for column in cursor.description]
+    )
+
+
+def _epoch(dt: datetime) -> int:
+    """Unix seconds for a naive UTC datetime (first_seen_date storage)."""
+    return calendar.timegm(dt.utctimetuple())
+
+
+@lru_cache(maxsize=None)
+def _get_conn(db_path: str, read_only: bool = False) -> sqlite3.Connection:
+    """
+    Open a shared connection for a database (once per path and mode).
+    
+    Args:
+        db_path: SQLite database file
+        read_only: Open with PRAGMA query_only, for the read helpers
+    
+    Returns:
+        Connection with row access by name and the tuning PRAGMAs applied
+    """
+    conn = sqlite3.connect(db_path, check_same_thread=False)
+    conn.row_factory = sqlite3.Row  # Enable column access by name
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA mmap_size=268435456")
+    conn.execute("PRAGMA cache_size=-65536")
+    migrate_schema(conn)
+    if read_only:
+        conn.execute("PRAGMA query_only=1")
+    atexit.register(conn.close)
+    return conn
 
 
 @contextmanager
-def get_db_connection(db_path=None):
-    """Context manager for database connections."""
+def get_db_connection(db_path=None, read_only: bool = False):
+    """Context manager for a shared database connection (left open)."""
     if db_path is None:
         db_path = DB_PATH
     
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row  # Enable column access by name
-    try:
-        yield conn
-    finally:
-        conn.close()
+    with _conn_lock:
+        conn = _get_conn(db_path, read_only)
+        
+        if _txn_depth and not read_only:
+            # Inside transaction(): a failing helper only undoes its own writes
+            conn.execute("SAVEPOINT helper")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK TO helper")
+                conn.execute("RELEASE helper")
+                raise
+            conn.execute("RELEASE helper")
+            return
+        
+        try:
+            yield conn
+        except BaseException:
+            # Don't leave a failed helper's writes pending for the next commit
+            conn.rollback()
+            raise
+
+
+def _commit(conn: sqlite3.Connection):
+    """Commit a helper's writes, unless a transaction() block will commit them."""
+    if not _txn_depth:
+        conn.commit()
+
+
+@contextmanager
+def transaction(db_path=None):
+    """
+    Run a block of write helpers as one transaction (one commit / fsync).
+    
+    The connection lock is held throughout, so other threads' helpers wait
+    for the block to finish. Everything is rolled back if the block raises.
+    
+    Args:
+        db_path: SQLite database file (defaults to DB_PATH)
+    """
+    global _txn_depth
+    
+    with get_db_connection(db_path) as conn:
+        if not _txn_depth:
+            conn.commit()
+            conn.execute("BEGIN IMMEDIATE")
+        
+        _txn_depth += 1
+        try:
+            yield conn
+        except BaseException:
+            _txn_depth -= 1
+            if not _txn_depth:
+                conn.rollback()
+            raise
+        
+        _txn_depth -= 1
+        if not _txn_depth:
+            conn.commit()
 
 
 # ===== System State =====
@@ -44,7 +166,7 @@ def set_system_state(key: str, value: str):
             INSERT OR REPLACE INTO system_state (key, value)
             VALUES (?, ?)
         """, (key, value))
-        conn.commit()
+        _commit(conn)
 
 
 # ===== Emails Processed =====
@@ -60,23 +182,115 @@ def is_email_processed(message_id: str) -> bool:
         return cursor.fetchone() is not None
 
 
+def get_processed_ids(message_ids: List[str]) -> Set[str]:
+    """
+    Batched is_email_processed.
+    
+    Args:
+        message_ids: Gmail message IDs to check
+    
+    Returns:
+        The subset of message_ids that have already been processed
+    """
+    ids = list(dict.fromkeys(message_ids))
+    processed = set()
+    if not ids:
+        return processed
+    
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        for start in range(0, len(ids), _BATCH_CHUNK):
+            chunk = ids[start:start + _BATCH_CHUNK]
+            placeholders = ", ".join("?" for _ in chunk)
+            cursor.execute(f"""
+                SELECT email_message_id FROM emails_processed
+                WHERE email_message_id IN ({placeholders})
+            """, chunk)
+            processed.update(row[0] for row in cursor.fetchall())
+        
+        return processed
+
+
+def get_all_processed_ids() -> List[str]:
+    """Get the message ID of every processed email."""
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        cursor.execute("SELECT email_message_id FROM emails_processed")
+        return [row[0] for row in cursor.fetchall()]
+
+
+def get_processed_content_keys(content_keys: List[bytes]) -> Set[bytes]:
+    """
+    Find which content fingerprints belong to already-processed emails.
+    
+    Args:
+        content_keys: Fingerprints from dedupe.content_key
+    
+    Returns:
+        The subset of content_keys already stored in emails_processed
+    """
+    keys = list(dict.fromkeys(content_keys))
+    processed = set()
+    if not keys:
+        return processed
+    
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        for start in range(0, len(keys), _BATCH_CHUNK):
+            chunk = keys[start:start + _BATCH_CHUNK]
+            placeholders = ", ".join("?" for _ in chunk)
+            cursor.execute(f"""
+                SELECT DISTINCT content_key FROM emails_processed
+                WHERE content_key IN ({placeholders})
+            """, chunk)
+            processed.update(row[0] for row in cursor.fetchall())
+        
+        return processed
+
+
 def mark_email_processed(
     message_id: str,
     thread_id: str,
     received_at: datetime,
     from_domain: str,
     subject: str,
-    classification: str
+    classification: str,
+    content_key: Optional[bytes] = None
 ):
     """Mark an email as processed."""
     with get_db_connection() as conn:
         cursor = conn.cursor()
         cursor.execute("""
             INSERT OR IGNORE INTO emails_processed
-            (email_message_id, thread_id, received_at, from_domain, subject, classification, processed_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-        """, (message_id, thread_id, received_at, from_domain, subject, classification, datetime.utcnow()))
-        conn.commit()
+            (email_message_id, thread_id, received_at, from_domain, subject, classification, content_key, processed_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (message_id, thread_id, received_at, from_domain, subject, classification, content_key, datetime.utcnow()))
+        _commit(conn)
+
+
+def bulk_mark_emails_processed(rows: List[Tuple]):
+    """
+    Mark several emails as processed in one transaction.
+    
+    Args:
+        rows: (message_id, thread_id, received_at, from_domain, subject,
+            classification, content_key) tuples
+    """
+    if not rows:
+        return
+    
+    now = datetime.utcnow()
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.executemany("""
+            INSERT OR IGNORE INTO emails_processed
+            (email_message_id, thread_id, received_at, from_domain, subject, classification, content_key, processed_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, [(*row, now) for row in rows])
+        _commit(conn)
 
 
 # ===== Applications =====
@@ -100,12 +314,53 @@ def create_application(
             INSERT INTO applications
             (company, role_title, platform, source, applied_date, first_seen_date, status, last_updated, portal_link, notes)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (company, role_title, platform, source, applied_date, now, status, now, portal_link, notes))
+        """, (company, role_title, platform, source, applied_date, _epoch(now), status, now, portal_link, notes))
         
-        conn.commit()
+        _commit(conn)
         return cursor.lastrowid
 
 
+def create_applications_batch(applications: List[Dict]) -> List[int]:
+    """
+    Create several application records in one transaction.
+    
+    Args:
+        applications: Dicts with create_application's keyword arguments
+    
+    Returns:
+        application_id for each input, in order
+    """
+    if not applications:
+        return []
+    
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        now = datetime.utcnow()
+        
+        app_ids = []
+        for app in applications:
+            cursor.execute("""
+                INSERT INTO applications
+                (company, role_title, platform, source, applied_date, first_seen_date, status, last_updated, portal_link, notes)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                app['company'],
+                app['role_title'],
+                app.get('platform'),
+                app.get('source'),
+                app.get('applied_date'),
+                _epoch(now),
+                app.get('status', 'applied'),
+                now,
+                app.get('portal_link'),
+                app.get('notes')
+            ))
+            app_ids.append(cursor.lastrowid)
+        
+        _commit(conn)
+        return app_ids
+
+
 def get_application_by_id(application_id: int) -> Optional[Dict]:
     """Get application by ID."""
     with get_db_connection() as conn:
@@ -132,6 +387,49 @@ def find_applications_by_company_role(company: str, role_title: str, threshold:
         return [dict(row) for row in cursor.fetchall()]
 
 
+def find_applications_by_company_role_batch(pairs: List[Tuple[str, str]]) -> List[List[Dict]]:
+    """
+    Batched find_applications_by_company_role: one query per chunk of pairs.
+    
+    Args:
+        pairs: (company, role_title) tuples
+    
+    Returns:
+        Matching applications for each pair (same order as pairs), each
+        list ordered by last_updated DESC
+    """
+    results = [[] for _ in pairs]
+    if not pairs:
+        return results
+    
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        for start in range(0, len(pairs), _BATCH_CHUNK):
+            chunk = pairs[start:start + _BATCH_CHUNK]
+            values = ", ".join("(?, ?, ?)" for _ in chunk)
+            params = [
+                value
+                for idx, (company, role_title) in enumerate(chunk, start)
+                for value in (idx, company, role_title)
+            ]
+            cursor.execute(f"""
+                WITH wanted(idx, company, role_title) AS (VALUES {values})
+                SELECT w.idx AS wanted_idx, a.*
+                FROM wanted w
+                JOIN applications a
+                  ON LOWER(a.company) = LOWER(w.company)
+                 AND LOWER(a.role_title) = LOWER(w.role_title)
+                ORDER BY a.last_updated DESC
+            """, params)
+            
+            for row in cursor.fetchall():
+                app = dict(row)
+                results[app.pop('wanted_idx')].append(app)
+        
+        return results
+
+
 def find_applications_by_portal_link(portal_link: str) -> List[Dict]:
     """Find applications by portal link."""
     with get_db_connection() as conn:
@@ -145,6 +443,41 @@ def find_applications_by_portal_link(portal_link: str) -> List[Dict]:
         return [dict(row) for row in cursor.fetchall()]
 
 
+def find_applications_by_portal_links(portal_links: List[str]) -> Dict[str, List[Dict]]:
+    """
+    Batched find_applications_by_portal_link.
+    
+    Args:
+        portal_links: Portal links to look up
+    
+    Returns:
+        Dict of portal_link -> matching applications (last_updated DESC);
+        links without matches are omitted
+    """
+    links = list(dict.fromkeys(portal_links))
+    results = {}
+    if not links:
+        return results
+    
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        
+        for start in range(0, len(links), _BATCH_CHUNK):
+            chunk = links[start:start + _BATCH_CHUNK]
+            placeholders = ", ".join("?" for _ in chunk)
+            cursor.execute(f"""
+                SELECT * FROM applications
+                WHERE portal_link IN ({placeholders})
+                ORDER BY last_updated DESC
+            """, chunk)
+            
+            for row in cursor.fetchall():
+                app = dict(row)
+                results.setdefault(app['portal_link'], []).append(app)
+        
+        return results
+
+
 def update_application_status(application_id: int, status: str, notes: Optional[str] = None):
     """Update application status."""
     with get_db_connection() as conn:
@@ -163,12 +496,12 @@ def update_application_status(application_id: int, status: str, notes: Optional[
                 WHERE application_id = ?
             """, (status, datetime.utcnow(), application_id))
         
-        conn.commit()
+        _commit(conn)
 
 
 def get_all_applications(limit: Optional[int] = None) -> List[Dict]:
     """Get all applications, ordered by last_updated DESC."""
-    with get_db_connection() as conn:
+    with get_db_connection(read_only=True) as conn:
         cursor = conn.cursor()
         
         query = "SELECT * FROM applications ORDER BY last_updated DESC"
@@ -179,6 +512,33 @@ def get_all_applications(limit: Optional[int] = None) -> List[Dict]:
         return [dict(row) for row in cursor.fetchall()]
 
 
+def get_all_applications_df():
+    """
+    Get all applications as a DataFrame, ordered by last_updated DESC.
+    
+    Built directly from the result set. Dates come back formatted for
+    display ('' if unparseable): first_seen_date as YYYY-MM-DD,
+    last_updated as YYYY-MM-DD HH:MM.
+    
+    Returns:
+        pandas DataFrame with one row per application
+    """
+    with get_db_connection(read_only=True) as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = None  # plain tuples for from_records
+        cursor.execute("""
+            SELECT application_id, company, role_title, platform, source, applied_date,
+                   COALESCE(strftime('%Y-%m-%d', first_seen_date, 'unixepoch'), '') AS first_seen_date,
+                   status,
+                   COALESCE(strftime('%Y-%m-%d %H:%M', last_updated), '') AS last_updated,
+                   portal_link, notes
+            FROM applications
+            -- Qualified: the bare name would sort by the formatted alias
+            ORDER BY applications.last_updated DESC
+        """)
+        return _rows_to_df(cursor)
+
+
 # ===== Events =====
 
 def create_event(
@@ -212,10 +572,34 @@ def create_event(
             action_suggestion
         ))
         
-        conn.commit()
+        _commit(conn)
         return cursor.lastrowid
 
 
+def bulk_create_events(rows: List[Tuple]):
+    """
+    Create several event records in one transaction.
+    
+    Events already recorded for the same (email, application) are skipped.
+    
+    Args:
+        rows: (application_id, event_type, event_time, email_message_id,
+            subject, from_email, confidence, extracted_json, action_suggestion)
+            tuples, extracted_json as a dict
+    """
+    if not rows:
+        return
+    
+    with get_db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.executemany("""
+            INSERT OR IGNORE INTO events
+            (application_id, event_type, event_time, email_message_id, subject, from_email, confidence, extracted_json, action_suggestion)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, [(*row[:7], json.dumps(row[7]), row[8]) for row in rows])
+        _commit(conn)
+
+
 def get_events_for_application(application_id: int) -> List[Dict]:
     """Get all events for an application."""
     with get_db_connection() as conn:
@@ -237,7 +621,7 @@ def get_events_for_application(application_id: int) -> List[Dict]:
 
 def get_recent_events(limit: int = 100) -> List[Dict]:
     """Get recent events across all applications."""
-    with get_db_connection() as conn:
+    with get_db_connection(read_only=True) as conn:
         cursor = conn.cursor()
         cursor.execute("""
             SELECT e.*, a.company, a.role_title, a.status as application_status
@@ -256,11 +640,89 @@ def get_recent_events(limit: int = 100) -> List[Dict]:
         return events
 
 
+def get_recent_events_for_display(limit: int = 100):
+    """
+    Get recent events as a DataFrame with only the dashboard's columns.
+    
+    extracted_json and the other unused event columns are never read.
+    
+    Args:
+        limit: Maximum number of events
+    
+    Returns:
+        pandas DataFrame (event_time, company, role_title, event_type,
+        subject, confidence, action_suggestion) ordered by event_time DESC,
+        event_time formatted as YYYY-MM-DD HH:MM; events whose time can't
+        be parsed are left out
+    """
+    with get_db_connection(read_only=True) as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = None  # plain tuples for from_records
+        cursor.execute("""
+            SELECT strftime('%Y-%m-%d %H:%M', e.event_time) AS event_time,
+                   a.company, a.role_title, e.event_type,
+                   e.subject, e.confidence, e.action_suggestion
+            FROM events e
+            JOIN applications a USING (application_id)
+            WHERE strftime('%Y-%m-%d %H:%M', e.event_time) IS NOT NULL
+            ORDER BY e.event_time DESC
+            LIMIT ?
+        """, (limit,))
+        return _rows_to_df(cursor)
+
+
 # ===== Analytics Queries =====
 
+def get_dashboard_snapshot(days: int = 30) -> Dict:
+    """
+    Get every dashboard aggregate in one round-trip.
+    
+    The status counts, event type counts and KPI counts are stacked into
+    one UNION ALL result of (kind, key, count) rows and split here.
+    
+    Args:
+        days: Window for the recent-applications count
+    
+    Returns:
+        {
+            'status_counts': Dict[str, int] (count DESC),
+            'event_counts': Dict[str, int] (count DESC),
+            'total_recent': int (applications first seen in the window),
+            'response_rate': float (events other than confirmations per
+                100 applications)
+        }
+    """
+    cutoff = _epoch(datetime.utcnow() - timedelta(days=days))
+    
+    with get_db_connection(read_only=True) as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT 'status' AS kind, status AS key, COUNT(*) AS count
+            FROM applications GROUP BY status
+            UNION ALL
+            SELECT 'event', event_type, COUNT(*)
+            FROM events GROUP BY event_type
+            UNION ALL
+            SELECT 'kpi', 'total_recent', COUNT(*)
+            FROM applications WHERE first_seen_date > ?
+            UNION ALL
+            SELECT 'kpi', 'response_rate', COALESCE(
+                (SELECT COUNT(*) FROM events WHERE event_type != 'confirmation') * 100.0
+                / NULLIF((SELECT COUNT(*) FROM applications), 0), 0.0)
+            ORDER BY kind, count DESC
+        """, (cutoff,))
+        
+        snapshot = {'status_counts': {}, 'event_counts': {}}
+        groups = {'status': snapshot['status_counts'], 'event': snapshot['event_counts'], 'kpi': snapshot}
+        for kind, key, count in cursor.fetchall():
+            groups[kind][key] = count
+        
+        return snapshot
+
+
 def get_status_counts() -> Dict[str, int]:
     """Get count of applications by status."""
-    with get_db_connection() as conn:
+    with get_db_connection(read_only=True) as conn:
         cursor = conn.cursor()
         cursor.execute("""
             SELECT status, COUNT(*) as count
@@ -269,7 +731,36 @@ def get_status_counts() -> Dict[str, int]:
             ORDER BY count DESC
         """)
         
-        return {row[0]: row[1] for row in cursor.fetchall()}
+        # Rows are already (key, count) pairs
+        return dict(cursor.fetchall())
+
+
+def get_applications_per_day(days: int = 30) -> Tuple[List[str], List[int]]:
+    """
+    Count applications first seen per (UTC) day over the last N days.
+    
+    Args:
+        days: Window size in days
+    
+    Returns:
+        (dates, counts): ISO date strings in ascending order and the
+        matching application counts
+    """
+    cutoff = _epoch(datetime.utcnow() - timedelta(days=days))
+    
+    with get_db_connection(read_only=True) as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT date(first_seen_date, 'unixepoch') AS day, COUNT(*) AS count
+            FROM applications
+            WHERE first_seen_date > ?
+            AND date(first_seen_date, 'unixepoch') IS NOT NULL
+            GROUP BY day
+            ORDER BY day
+        """, (cutoff,))
+        
+        rows = cursor.fetchall()
+        return [row[0] for row in rows], [row[1] for row in rows]
 
 
 def get_applications_by_date_range(start_date: datetime, end_date: datetime) -> List[Dict]:
@@ -280,14 +771,14 @@ def get_applications_by_date_range(start_date: datetime, end_date: datetime) ->
             SELECT * FROM applications
             WHERE first_seen_date BETWEEN ? AND ?
             ORDER BY first_seen_date DESC
-        """, (start_date, end_date))
+        """, (_epoch(start_date), _epoch(end_date)))
         
         return [dict(row) for row in cursor.fetchall()]
 
 
 def get_event_type_counts() -> Dict[str, int]:
     """Get count of events by type."""
-    with get_db_connection() as conn:
+    with get_db_connection(read_only=True) as conn:
         cursor = conn.cursor()
         cursor.execute("""
             SELECT event_type, COUNT(*) as count
@@ -296,4 +787,5 @@ def get_event_type_counts() -> Dict[str, int]:
             ORDER BY count DESC
         """)
         
-        return {row[0]: row[1] for row in cursor.fetchall()}
+        # Rows are already (key, count) pairs
+        return dict(cursor.fetchall())
@@ -2,25 +2,32 @@
 Email polling worker for Job Application Tracker.
 Runs every N minutes to check for new job-related emails and process them.
 """
+import json
 import time
 import sys
+import queue
+import threading
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from app.config import POLL_INTERVAL_SECONDS
+from app.config import POLL_INTERVAL_SECONDS, POLL_MAX_INTERVAL_SECONDS, POLL_MAX_MESSAGES
 from app.utils.logger import setup_logger
 from app.utils.gmail_client import GmailClient
-from app.utils.dedupe import get_unprocessed_messages
+from app.utils.dedupe import content_key, get_unprocessed_ids
 from app.utils.text_clean import extract_email_domain
 from app.db.models import (
     get_system_state,
     set_system_state,
-    mark_email_processed,
+    get_processed_content_keys,
+    bulk_mark_emails_processed,
     update_application_status,
-    create_event
+    bulk_create_events,
+    transaction
 )
 from app.agents.filter_agent import FilterAgent
 from app.agents.classify_agent import ClassifyAgent
@@ -30,6 +37,19 @@ from app.agents.action_agent import ActionAgent
 
 logger = setup_logger(__name__)
 
+# Buffered event / processed-email rows are written once this many accumulate
+_FLUSH_EVERY = 100
+
+# Messages fetched per Gmail batch, and how many fetched batches may wait
+# ahead of processing
+_FETCH_CHUNK = 50
+_PREFETCH_BATCHES = 4
+
+# Cycles a message that fails to fetch or process is retried before it is
+# given up on (its id is logged); also how long an added message the search
+# hasn't returned keeps the search running
+_MAX_RETRY_CYCLES = 5
+
 
 class EmailPoller:
     """Worker that polls Gmail for job-related emails."""
@@ -41,11 +61,28 @@ class EmailPoller:
         self.extract_agent = ExtractAgent()
         self.resolve_agent = ResolveAgent()
         self.action_agent = ActionAgent()
+        
+        # Long-lived fetch thread: its Gmail service (and HTTPS connection)
+        # is kept across polling cycles
+        self._fetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="gmail-fetch")
+        
+        # Rows for bulk_create_events / bulk_mark_emails_processed
+        self._pending_events = []
+        self._pending_processed = []
+        
+        # Content fingerprints already processed (DB hits plus this cycle's)
+        self._content_keys = set()
     
-    def poll_once(self):
-        """Run one polling cycle."""
+    def poll_once(self) -> int:
+        """
+        Run one polling cycle.
+        
+        Returns:
+            Number of new messages found (0 if the cycle failed)
+        """
         logger.info("=" * 60)
         logger.info("Starting polling cycle")
+        cycle_start = datetime.utcnow()
         
         try:
             # Get last checked timestamp
@@ -53,77 +90,263 @@ class EmailPoller:
             
             if last_checked_iso:
                 last_checked = datetime.fromisoformat(last_checked_iso)
-                logger.info(f"Last checked: {last_checked}")
+                logger.info("Last checked: %s", last_checked)
             else:
                 # Default to 30 days ago
                 last_checked = datetime.utcnow() - timedelta(days=30)
                 logger.info("No previous check found, searching last 30 days")
             
-            # Fetch new job-related emails
-            messages = self.gmail_client.search_job_related_emails(since=last_checked)
-            logger.info(f"Found {len(messages)} potential job emails")
+            # Messages added since the last cycle, when Gmail still has the
+            # history; otherwise fall back to the date-bounded search alone
+            added_ids = None
+            last_history_id = get_system_state('last_history_id')
+            history = None
+            if last_history_id:
+                history = self.gmail_client.get_added_message_ids(last_history_id)
+            if history is not None:
+                added_ids, history_id = history
+            else:
+                history_id = self.gmail_client.get_history_id()
             
-            # Filter out already processed
-            unprocessed = get_unprocessed_messages(messages)
-            logger.info(f"{len(unprocessed)} new messages to process")
+            # Added messages the search hasn't returned yet (Gmail's search
+            # index lags behind new mail); they keep the search running
+            search_pending = json.loads(get_system_state('search_pending_ids') or '{}')
             
-            # Process each message
-            processed_count = 0
-            for message in unprocessed:
+            # Find new job-related emails. History only decides whether to
+            # search at all: hits aren't limited to added_ids, so anything a
+            # lagging or failed earlier search missed is still picked up
+            search_complete = True
+            if added_ids is not None and not added_ids and not search_pending:
+                message_ids = []
+            else:
                 try:
-                    self._process_message(message)
-                    processed_count += 1
+                    message_ids = self.gmail_client.search_job_related_ids(since=last_checked, raise_errors=True)
+                    search_complete = len(message_ids) < POLL_MAX_MESSAGES
                 except Exception as e:
-                    logger.error(f"Error processing message {message['id']}: {e}", exc_info=True)
+                    logger.error("Job search failed, keeping the history cursor: %s", e)
+                    message_ids = []
+                    search_complete = False
+                if not search_complete:
+                    logger.warning("Job search incomplete; it will be repeated next cycle")
+            logger.info("Found %s potential job emails", len(message_ids))
+            
+            # Messages that failed in earlier cycles: the history cursor has
+            # moved past them, so they are carried over by id
+            retry_counts = json.loads(get_system_state('retry_message_ids') or '{}')
+            if retry_counts:
+                logger.info("Retrying %s previously failed messages", len(retry_counts))
+                message_ids = list(dict.fromkeys(message_ids + list(retry_counts)))
             
-            # Update last checked timestamp
-            set_system_state('last_checked_iso', datetime.utcnow().isoformat())
+            # Filter out already processed before fetching any bodies
+            unprocessed_ids = get_unprocessed_ids(message_ids)
+            logger.info("%s new messages to process", len(unprocessed_ids))
             
-            logger.info(f"Polling cycle complete. Processed {processed_count}/{len(unprocessed)} messages")
+            # Process each message (fetched in the background meanwhile);
+            # all of the cycle's writes are committed together
+            processed_count = 0
+            done_ids = set()
+            self._content_keys = set()
+            with transaction():
+                try:
+                    for batch in self._iter_batches(unprocessed_ids):
+                        # Resends of already-processed content, one query per batch
+                        keys = [content_key(message) for message in batch]
+                        self._content_keys.update(get_processed_content_keys(keys))
+                        
+                        for message, key in zip(batch, keys):
+                            try:
+                                self._process_message(message, key)
+                                processed_count += 1
+                                done_ids.add(message['id'])
+                            except Exception as e:
+                                logger.error("Error processing message %s: %s", message['id'], e, exc_info=True)
+                            
+                            if len(self._pending_processed) >= _FLUSH_EVERY:
+                                self._flush_pending()
+                finally:
+                    self._flush_pending()
+                
+                # Anything not fetched or not processed is retried next cycle
+                set_system_state('retry_message_ids', json.dumps(
+                    self._next_retry_counts(unprocessed_ids, done_ids, retry_counts)
+                ))
+                
+                if search_complete:
+                    set_system_state('search_pending_ids', json.dumps(
+                        self._next_search_pending(added_ids, message_ids, search_pending)
+                    ))
+                    
+                    # Update last checked timestamp; after a failed or
+                    # truncated search both cursors stay put so the same
+                    # window is searched again
+                    set_system_state('last_checked_iso', cycle_start.isoformat())
+                    if history_id:
+                        set_system_state('last_history_id', history_id)
+            
+            logger.info("Polling cycle complete. Processed %s/%s messages", processed_count, len(unprocessed_ids))
+            # Retries alone don't count as new mail (they'd stop the backoff)
+            return sum(1 for msg_id in unprocessed_ids if msg_id not in retry_counts)
         
         except Exception as e:
-            logger.error(f"Error in polling cycle: {e}", exc_info=True)
+            logger.error("Error in polling cycle: %s", e, exc_info=True)
+            return 0
+    
+    @staticmethod
+    def _next_retry_counts(unprocessed_ids: list, done_ids: set, retry_counts: dict) -> dict:
+        """
+        Work out which messages to retry next cycle.
+        
+        Args:
+            unprocessed_ids: Message IDs this cycle tried to process
+            done_ids: IDs processed successfully
+            retry_counts: Failed cycles so far per retried ID
+        
+        Returns:
+            Failed cycles per ID still to retry
+        """
+        next_counts = {}
+        for msg_id in unprocessed_ids:
+            if msg_id in done_ids:
+                continue
+            failures = retry_counts.get(msg_id, 0) + 1
+            if failures >= _MAX_RETRY_CYCLES:
+                logger.error("Giving up on message %s after %s failed cycles", msg_id, failures)
+            else:
+                next_counts[msg_id] = failures
+        
+        if next_counts:
+            logger.warning("%s messages failed and will be retried next cycle", len(next_counts))
+        return next_counts
+    
+    @staticmethod
+    def _next_search_pending(added_ids: Optional[set], message_ids: list, search_pending: dict) -> dict:
+        """
+        Work out which added messages to keep searching for next cycle.
+        
+        Most added mail is not job-related and never shows up in the search,
+        so each ID is only waited for _MAX_RETRY_CYCLES cycles.
+        
+        Args:
+            added_ids: Message IDs history reported this cycle (None without history)
+            message_ids: IDs the search returned this cycle
+            search_pending: Cycles waited so far per pending ID
+        
+        Returns:
+            Cycles waited per ID still pending
+        """
+        found = set(message_ids)
+        next_pending = {}
+        for msg_id in set(search_pending).union(added_ids or ()):
+            if msg_id in found:
+                continue
+            cycles = search_pending.get(msg_id, 0) + 1
+            if cycles < _MAX_RETRY_CYCLES:
+                next_pending[msg_id] = cycles
+        return next_pending
+    
+    def _iter_batches(self, message_ids: list):
+        """
+        Yield message batches, fetching later ones while earlier ones are processed.
+        
+        The Gmail fetch is network-bound and the agents are CPU-bound, so a
+        background thread keeps up to _PREFETCH_BATCHES batches ready. The
+        agents and DB writes stay on the calling thread.
+        
+        Args:
+            message_ids: Gmail message IDs to fetch
+        
+        Yields:
+            Lists of message dictionaries, in message_ids order
+        """
+        batches = queue.Queue(maxsize=_PREFETCH_BATCHES)
+        stop = threading.Event()
+        
+        def fetch():
+            try:
+                for start in range(0, len(message_ids), _FETCH_CHUNK):
+                    if stop.is_set():
+                        break
+                    batches.put(self.gmail_client.get_messages(message_ids[start:start + _FETCH_CHUNK]))
+            except Exception as e:
+                logger.error("Error fetching messages: %s", e, exc_info=True)
+            finally:
+                batches.put(None)
+        
+        fetcher = self._fetch_executor.submit(fetch)
+        
+        try:
+            while True:
+                batch = batches.get()
+                if batch is None:
+                    break
+                yield batch
+        finally:
+            # Unblock the fetcher if processing stopped early
+            stop.set()
+            while not fetcher.done():
+                try:
+                    batches.get(timeout=0.1)
+                except queue.Empty:
+                    pass
     
-    def _process_message(self, message: dict):
+    def _process_message(self, message: dict, key: Optional[bytes] = None):
         """Process a single email message through the agent pipeline."""
         msg_id = message['id']
         subject = message['subject']
+        from_domain = extract_email_domain(message['from']) or ''
+        if key is None:
+            key = content_key(message)
+        
+        # Same content already processed under another message ID (resend)
+        if key in self._content_keys:
+            logger.info("Skipping duplicate content: %.60s...", subject)
+            self._pending_processed.append((
+                msg_id,
+                message['thread_id'],
+                message['received_at'],
+                from_domain,
+                subject,
+                'duplicate',
+                key
+            ))
+            return
         
-        logger.info(f"Processing: {subject[:60]}...")
+        logger.info("Processing: %.60s...", subject)
         
         # Step 1: Filter - is it job-related?
-        filter_result = self.filter_agent.run(message)
+        filter_result = self.filter_agent.run_cached(message)
         
         if not filter_result['is_job_related']:
-            logger.debug(f"Skipping (not job-related): {filter_result['reason']}")
+            logger.debug("Skipping (not job-related): %s", filter_result['reason'])
             # Still mark as processed to avoid reprocessing
-            from_domain = extract_email_domain(message['from'])
-            mark_email_processed(
-                message_id=msg_id,
-                thread_id=message['thread_id'],
-                received_at=message['received_at'],
-                from_domain=from_domain or '',
-                subject=subject,
-                classification='not_job_related'
-            )
+            self._content_keys.add(key)
+            self._pending_processed.append((
+                msg_id,
+                message['thread_id'],
+                message['received_at'],
+                from_domain,
+                subject,
+                'not_job_related',
+                key
+            ))
             return
         
-        logger.debug(f"✓ Job-related: {filter_result['reason']}")
+        logger.debug("✓ Job-related: %s", filter_result['reason'])
         
         # Step 2: Classify event type
-        classify_result = self.classify_agent.run(message)
+        classify_result = self.classify_agent.run_cached(message)
         event_type = classify_result['event_type']
         status_update = classify_result['status_update']
         confidence = classify_result['confidence']
         
-        logger.debug(f"✓ Classified as: {event_type} (confidence: {confidence:.2f})")
+        logger.debug("✓ Classified as: %s (confidence: %.2f)", event_type, confidence)
         
         # Step 3: Extract structured data
-        extracted_data = self.extract_agent.run(message)
+        extracted_data = self.extract_agent.run_cached(message)
         company = extracted_data['company']
         role_title = extracted_data['role_title']
         
-        logger.debug(f"✓ Extracted: {company} - {role_title}")
+        logger.debug("✓ Extracted: %s - %s", company, role_title)
         
         # Step 4: Resolve to application
         resolve_result = self.resolve_agent.run(extracted_data)
@@ -131,57 +354,83 @@ class EmailPoller:
         is_new = resolve_result['is_new']
         match_method = resolve_result['match_method']
         
-        logger.debug(f"✓ Resolved to application {application_id} ({match_method}, new={is_new})")
+        logger.debug("✓ Resolved to application %s (%s, new=%s)", application_id, match_method, is_new)
         
         # Step 5: Generate action suggestion
         action_result = self.action_agent.run(event_type, extracted_data)
         action_suggestion = action_result['action_suggestion']
         
-        logger.debug(f"✓ Action: {action_suggestion[:60]}...")
-        
-        # Save event
-        create_event(
-            application_id=application_id,
-            event_type=event_type,
-            event_time=message['received_at'],
-            email_message_id=msg_id,
-            subject=subject,
-            from_email=message['from'],
-            confidence=confidence,
-            extracted_json=extracted_data,
-            action_suggestion=action_suggestion
-        )
+        logger.debug("✓ Action: %.60s...", action_suggestion)
+        
+        # Save event (buffered)
+        self._pending_events.append((
+            application_id,
+            event_type,
+            message['received_at'],
+            msg_id,
+            subject,
+            message['from'],
+            confidence,
+            extracted_data,
+            action_suggestion
+        ))
         
         # Update application status
         update_application_status(application_id, status_update)
         
-        # Mark email as processed
-        from_domain = extract_email_domain(message['from'])
-        mark_email_processed(
-            message_id=msg_id,
-            thread_id=message['thread_id'],
-            received_at=message['received_at'],
-            from_domain=from_domain or '',
-            subject=subject,
-            classification=event_type
-        )
+        # Mark email as processed (buffered); only now can later resends be
+        # treated as duplicates, so a failure above doesn't claim the content
+        self._content_keys.add(key)
+        self._pending_processed.append((
+            msg_id,
+            message['thread_id'],
+            message['received_at'],
+            from_domain,
+            subject,
+            event_type,
+            key
+        ))
         
-        logger.info(f"✓ Successfully processed message for {company} - {role_title}")
+        logger.info("✓ Successfully processed message for %s - %s", company, role_title)
+    
+    def _flush_pending(self):
+        """Write buffered events, then the processed-email marks, in bulk."""
+        # Events go first so no email is marked processed without its event
+        if self._pending_events:
+            bulk_create_events(self._pending_events)
+            self._pending_events = []
+        
+        if self._pending_processed:
+            bulk_mark_emails_processed(self._pending_processed)
+            self._pending_processed = []
     
     def run_forever(self):
-        """Run polling loop indefinitely."""
-        logger.info(f"Starting email poller (interval: {POLL_INTERVAL_SECONDS}s)")
+        """
+        Run polling loop indefinitely.
         
+        The interval starts at POLL_INTERVAL_SECONDS and doubles after every
+        cycle without new mail, up to POLL_MAX_INTERVAL_SECONDS; any new
+        message resets it.
+        """
+        logger.info(
+            "Starting email poller (interval: %ss, up to %ss when idle)",
+            POLL_INTERVAL_SECONDS, POLL_MAX_INTERVAL_SECONDS
+        )
+        
+        interval = POLL_INTERVAL_SECONDS
         while True:
             try:
-                self.poll_once()
-                logger.info(f"Sleeping for {POLL_INTERVAL_SECONDS} seconds...")
-                time.sleep(POLL_INTERVAL_SECONDS)
+                if self.poll_once():
+                    interval = POLL_INTERVAL_SECONDS
+                else:
+                    interval = min(interval * 2, max(POLL_MAX_INTERVAL_SECONDS, POLL_INTERVAL_SECONDS))
+                logger.info("Sleeping for %s seconds...", interval)
+                time.sleep(interval)
             except KeyboardInterrupt:
                 logger.info("Poller stopped by user")
                 break
             except Exception as e:
-                logger.error(f"Unexpected error: {e}", exc_info=True)
+                logger.error("Unexpected error: %s", e, exc_info=True)
                 logger.info("Continuing after error...")
                 time.sleep(POLL_INTERVAL_SECONDS)
 
@@ -130,6 +130,68 @@ def test_rejection_priority():
     print("✓ Test 7 passed: Rejection priority")
 
 
+def test_run_batch_matches_run():
+    """Test that run_batch gives the same results as run per email."""
+    agent = ClassifyAgent()
+    
+    emails = [
+        {
+            'subject': 'Interview Update',
+            'body': 'Unfortunately, we will not be moving forward with your application.',
+            'snippet': ''
+        },
+        {
+            'subject': 'Complete Your Coding Challenge',
+            'body': 'Please complete the HackerRank coding challenge within 48 hours.',
+            'snippet': 'coding challenge'
+        },
+        {
+            'subject': 'Weekly newsletter',
+            'body': '',
+            'snippet': ''
+        },
+        {
+            'subject': 'Congratulations! Job Offer',
+            'body': 'We are pleased to offer you the role. Offer letter attached.',
+            'snippet': 'pleased to offer'
+        },
+    ]
+    
+    assert agent.run_batch(emails) == [agent.run(e) for e in emails]
+    assert agent.run_batch([]) == []
+    
+    print("✓ Test 8 passed: Batch classification matches single")
+
+
+def test_overlapping_patterns_each_count():
+    """Test that overlapping patterns are scored independently."""
+    agent = ClassifyAgent()
+    
+    # "we have received" and "received your application" share "received"
+    email_data = {
+        'subject': '',
+        'body': 'We have received your application.',
+        'snippet': ''
+    }
+    
+    result = agent.run(email_data)
+    assert result['event_type'] == 'confirmation'
+    assert abs(result['confidence'] - 2 * 0.8 / 3.0) < 1e-9
+    
+    # Two confirmation hits (1.6) outweigh one rejection and one interview hit
+    email_data = {
+        'subject': '',
+        'body': 'Interview unfortunately we have received your application',
+        'snippet': ''
+    }
+    
+    for result in (agent.run(email_data), agent.run_batch([email_data])[0]):
+        assert result['event_type'] == 'confirmation'
+        assert abs(result['confidence'] - 2 * 0.8 / 3.0) < 1e-9
+    
+    print("✓ Test 9 passed: Overlapping patterns")
+
+
 def run_all_tests():
     """Run all classify tests."""
     print("Running ClassifyAgent tests...")
@@ -142,6 +204,8 @@ def run_all_tests():
     test_classify_offer()
     test_classify_update()
     test_rejection_priority()
+    test_run_batch_matches_run()
+    test_overlapping_patterns_each_count()
     
     print("=" * 60)
     print("✓ All ClassifyAgent tests passed!")
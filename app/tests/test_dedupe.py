@@ -0,0 +1,63 @@
+"""
+Tests for content-based deduplication keys.
+Uses anonymized sample email data.
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.utils.dedupe import content_key
+
+
+BASE_EMAIL = {
+    'from': 'Acme Careers <jobs@acme.com>',
+    'subject': 'Application Received - Software Engineer',
+    'body': 'Thank you for applying. Track it at https://jobs.acme.com/status?token=abc123'
+}
+
+
+def test_content_key_normalization():
+    """Test that case, whitespace and URL query strings don't change the key."""
+    resend = {
+        'from': 'ACME Careers   <JOBS@acme.com>',
+        'subject': '  application received -\tsoftware engineer ',
+        'body': 'Thank you for\n\napplying. Track it at https://jobs.acme.com/status?token=zzz999#top'
+    }
+    
+    assert content_key(resend) == content_key(BASE_EMAIL)
+    assert len(content_key(BASE_EMAIL)) == 16
+    
+    print("✓ Test 1 passed: Content key normalization")
+
+
+def test_content_key_distinguishes_content():
+    """Test that sender, subject, body and URL paths are all part of the key."""
+    for field, value in (
+        ('from', 'Other Co <jobs@other.com>'),
+        ('subject', 'Application Received - Data Engineer'),
+        ('body', 'Thank you for applying. Track it at https://jobs.acme.com/other?token=abc123'),
+    ):
+        assert content_key({**BASE_EMAIL, field: value}) != content_key(BASE_EMAIL), field
+    
+    # Only the body prefix is fingerprinted
+    long_body = 'x' * 5000
+    assert content_key({**BASE_EMAIL, 'body': long_body}) == content_key({**BASE_EMAIL, 'body': long_body + 'tail'})
+    
+    print("✓ Test 2 passed: Content key distinguishes content")
+
+
+def run_all_tests():
+    """Run all dedupe tests."""
+    print("Running dedupe tests...")
+    print("=" * 60)
+    
+    test_content_key_normalization()
+    test_content_key_distinguishes_content()
+    
+    print("=" * 60)
+    print("✓ All dedupe tests passed!")
+
+
+if __name__ == "__main__":
+    run_all_tests()
@@ -3,6 +3,7 @@ Tests for ExtractAgent.
 Uses anonymized sample email data.
 """
 import sys
+import time
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
@@ -102,6 +103,76 @@ def test_extract_platform():
     print("✓ Test 5 passed: Platform detection")
 
 
+def test_extract_pathological_whitespace():
+    """Test that long whitespace runs don't trigger regex backtracking blowups."""
+    agent = ExtractAgent()
+    
+    # Test case 6: Subject/body padded with thousands of spaces. Quadratic
+    # backtracking takes seconds on a 20000-space subject, linear matching
+    # well under 0.1s, so the limit leaves room for slow CI machines
+    email_data = {
+        'subject': 'A' + ' ' * 20000 + 'x',
+        'from': 'jobs@company.com',
+        'body': 'job' + ' ' * 1000 + '. Your application for A' + ' ' * 500,
+        'snippet': 'A' + ' ' * 500
+    }
+    
+    start = time.perf_counter()
+    agent.run(email_data)
+    elapsed = time.perf_counter() - start
+    assert elapsed < 2.0, f"extraction took {elapsed:.3f}s"
+    
+    print("✓ Test 6 passed: Pathological whitespace")
+
+
+def test_extract_run_cached():
+    """Test that run_cached matches run and keys on the whole body."""
+    agent = ExtractAgent()
+    
+    # Test case 7: Same prefix, different portal link past the prefix
+    email_data = {
+        'subject': 'Application Received - Software Engineer',
+        'from': 'Acme Careers <no-reply@acme.com>',
+        'body': 'Thanks for applying.' + ' ' * 2000 + 'Status: https://acme.wd1.myworkdayjobs.com/a',
+        'snippet': 'Thanks for applying.'
+    }
+    other = {**email_data, 'body': email_data['body'][:-1] + 'b'}
+    
+    assert agent.run_cached(email_data) == agent.run(email_data)
+    assert agent.run_cached(other) == agent.run(other)
+    assert agent.run_cached(other)['portal_link'] != agent.run_cached(email_data)['portal_link']
+    
+    # Callers get a fresh copy each time
+    agent.run_cached(email_data)['key_dates'].append('x')
+    assert agent.run_cached(email_data) == agent.run(email_data)
+    
+    # Keys hold a digest, not the body text
+    assert all(len(key[3]) == 16 for key in agent._cache)
+    
+    print("✓ Test 7 passed: Cached extraction")
+
+
+def test_extract_skips_overlong_candidate():
+    """Test that an overlong first candidate gives way to a later match."""
+    agent = ExtractAgent()
+    
+    # Test case 8: First "interest in ... position" capture is over 199 chars
+    email_data = {
+        'subject': 'Update from Acme',
+        'from': 'jobs@acme.com',
+        'body': (
+            'Thanks for your interest in the Senior ' + 'Very ' * 60 + 'Engineer position. '
+            'We also noted your interest in the Data Analyst role.'
+        ),
+        'snippet': ''
+    }
+    
+    result = agent.run(email_data)
+    assert result['role_title'] == 'Data Analyst'
+    
+    print("✓ Test 8 passed: Overlong candidate skipped")
+
+
 def run_all_tests():
     """Run all extract tests."""
     print("Running ExtractAgent tests...")
@@ -112,6 +183,9 @@ def run_all_tests():
     test_extract_portal_link()
     test_extract_req_id()
     test_extract_platform()
+    test_extract_pathological_whitespace()
+    test_extract_run_cached()
+    test_extract_skips_overlong_candidate()
     
     print("=" * 60)
     print("✓ All ExtractAgent tests passed!")
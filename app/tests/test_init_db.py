@@ -0,0 +1,118 @@
+"""
+Tests for database schema migrations.
+Uses an in-memory SQLite database.
+"""
+import sqlite3
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.db.init_db import SCHEMA_VERSION, migrate_schema
+
+
+def _create_v0_schema(conn):
+    """Create the original (user_version 0) applications / emails_processed tables."""
+    conn.execute("""
+        CREATE TABLE applications (
+            application_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            company TEXT NOT NULL,
+            role_title TEXT NOT NULL,
+            first_seen_date DATETIME NOT NULL,
+            status TEXT NOT NULL DEFAULT 'applied',
+            last_updated DATETIME NOT NULL
+        )
+    """)
+    conn.execute("""
+        CREATE TABLE emails_processed (
+            email_message_id TEXT PRIMARY KEY,
+            thread_id TEXT,
+            received_at DATETIME NOT NULL,
+            from_domain TEXT,
+            subject TEXT,
+            classification TEXT,
+            processed_at DATETIME NOT NULL
+        )
+    """)
+
+
+def test_migrate_schema_from_v0():
+    """Test upgrading a version 0 database to the current schema."""
+    conn = sqlite3.connect(':memory:')
+    _create_v0_schema(conn)
+    conn.execute(
+        "INSERT INTO applications (company, role_title, first_seen_date, last_updated) VALUES (?, ?, ?, ?)",
+        ('Acme', 'Engineer', '2024-03-01 12:00:00', '2024-03-01 12:00:00')
+    )
+    conn.executemany(
+        "INSERT INTO applications (company, role_title, first_seen_date, last_updated) VALUES (?, ?, ?, ?)",
+        [
+            ('Beta', 'Analyst', 'sometime in March', '2024-03-02 00:00:00'),
+            ('Gamma', 'Designer', 'unknown', 'never'),
+        ]
+    )
+    conn.execute(
+        "INSERT INTO emails_processed (email_message_id, received_at, processed_at) VALUES (?, ?, ?)",
+        ('m1', '2024-03-01 12:00:00', '2024-03-01 12:00:00')
+    )
+    conn.commit()
+    
+    migrate_schema(conn)
+    
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    
+    # Version 1: first_seen_date as unix seconds; unparseable strings fall
+    # back to last_updated, then 0, so none stay TEXT
+    rows = conn.execute("SELECT company, first_seen_date FROM applications ORDER BY company").fetchall()
+    assert rows == [('Acme', 1709294400), ('Beta', 1709337600), ('Gamma', 0)]
+    
+    # Version 2: indexed content_key column, NULL for existing rows
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(emails_processed)")}
+    assert 'content_key' in columns
+    assert conn.execute("SELECT content_key FROM emails_processed").fetchone()[0] is None
+    assert conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_emails_processed_content_key'"
+    ).fetchone()
+    
+    # Running again is a no-op
+    migrate_schema(conn)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    
+    print("✓ Test 1 passed: Migrate from version 0")
+
+
+def test_migrate_schema_from_v1():
+    """Test that a version 1 database only gets the version 2 changes."""
+    conn = sqlite3.connect(':memory:')
+    _create_v0_schema(conn)
+    conn.execute(
+        "INSERT INTO applications (company, role_title, first_seen_date, last_updated) VALUES (?, ?, ?, ?)",
+        ('Acme', 'Engineer', 1709294400, '2024-03-01 12:00:00')
+    )
+    conn.execute("PRAGMA user_version = 1")
+    conn.commit()
+    
+    migrate_schema(conn)
+    
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    assert conn.execute("SELECT first_seen_date FROM applications").fetchone()[0] == 1709294400
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(emails_processed)")}
+    assert 'content_key' in columns
+    
+    print("✓ Test 2 passed: Migrate from version 1")
+
+
+def run_all_tests():
+    """Run all init_db tests."""
+    print("Running init_db tests...")
+    print("=" * 60)
+    
+    test_migrate_schema_from_v0()
+    test_migrate_schema_from_v1()
+    
+    print("=" * 60)
+    print("✓ All init_db tests passed!")
+
+
+if __name__ == "__main__":
+    run_all_tests()
@@ -0,0 +1,133 @@
+"""
+Tests for the polling cycle's Gmail cursors.
+Uses a faked GmailClient and a temporary SQLite database.
+"""
+import sys
+import tempfile
+from datetime import datetime
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+import app.poller as poller_module
+from app.db import models
+from app.db.init_db import create_tables
+from app.db.models import get_processed_ids, get_system_state, set_system_state
+
+
+def _message(msg_id: str, hour: int) -> dict:
+    """Build an anonymized application-confirmation message."""
+    return {
+        'id': msg_id,
+        'thread_id': f't-{msg_id}',
+        'received_at': datetime(2024, 3, 1, hour),
+        'from': f'Careers <jobs@company{hour}.com>',
+        'subject': f'Application received: Software Engineer {hour}',
+        'snippet': 'Thank you for applying',
+        'body': f'Thank you for applying to Company{hour}. We have received your application.'
+    }
+
+
+class FakeGmail:
+    """GmailClient stand-in with scripted history and search results."""
+    
+    def __init__(self):
+        self.messages = {msg['id']: msg for msg in (_message('m1', 9), _message('m2', 10))}
+        self.added_ids = set()
+        self.history_id = '100'
+        self.search_result = []
+        self.search_error = None
+    
+    def get_added_message_ids(self, start_history_id):
+        return set(self.added_ids), self.history_id
+    
+    def get_history_id(self):
+        return self.history_id
+    
+    def search_job_related_ids(self, since=None, raise_errors=False):
+        if self.search_error:
+            raise self.search_error
+        return list(self.search_result)
+    
+    def get_messages(self, message_ids):
+        return [self.messages[msg_id] for msg_id in message_ids if msg_id in self.messages]
+
+
+def _make_poller(db_path: str):
+    """Build an EmailPoller on a fresh database with a FakeGmail client."""
+    create_tables(db_path)
+    models.DB_PATH = db_path
+    
+    original_client = poller_module.GmailClient
+    poller_module.GmailClient = FakeGmail
+    try:
+        poller = poller_module.EmailPoller()
+    finally:
+        poller_module.GmailClient = original_client
+    return poller
+
+
+def test_failed_search_keeps_cursors():
+    """Test that a failed or lagging search doesn't lose added messages."""
+    original_db_path = models.DB_PATH
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            poller = _make_poller(str(Path(tmp) / 'poller.db'))
+            gmail = poller.gmail_client
+            set_system_state('last_history_id', '99')
+            last_checked = get_system_state('last_checked_iso')
+            
+            # Cycle 1: two messages added, but the search fails
+            gmail.added_ids = {'m1', 'm2'}
+            gmail.history_id = '100'
+            gmail.search_error = RuntimeError('Gmail API error 503')
+            assert poller.poll_once() == 0
+            assert get_system_state('last_history_id') == '99'
+            assert get_system_state('last_checked_iso') == last_checked
+            assert get_processed_ids(['m1', 'm2']) == set()
+            
+            # Cycle 2: the search works but its index only has m1 so far
+            gmail.search_error = None
+            gmail.history_id = '101'
+            gmail.search_result = ['m1']
+            assert poller.poll_once() == 1
+            assert get_system_state('last_history_id') == '101'
+            assert get_processed_ids(['m1', 'm2']) == {'m1'}
+            
+            # Cycle 3: nothing new in history, but m2 is still awaited
+            gmail.added_ids = set()
+            gmail.history_id = '102'
+            gmail.search_result = ['m2', 'm1']
+            assert poller.poll_once() == 1
+            assert get_processed_ids(['m1', 'm2']) == {'m1', 'm2'}
+            assert get_system_state('search_pending_ids') == '{}'
+            
+            # Cycle 4: a truncated search doesn't advance the cursor
+            original_max = poller_module.POLL_MAX_MESSAGES
+            poller_module.POLL_MAX_MESSAGES = 2
+            try:
+                gmail.added_ids = {'m3'}
+                gmail.history_id = '103'
+                assert poller.poll_once() == 0
+                assert get_system_state('last_history_id') == '102'
+            finally:
+                poller_module.POLL_MAX_MESSAGES = original_max
+        finally:
+            models.DB_PATH = original_db_path
+    
+    print("✓ Test 1 passed: Failed search keeps cursors")
+
+
+def run_all_tests():
+    """Run all poller tests."""
+    print("Running poller tests...")
+    print("=" * 60)
+    
+    test_failed_search_keeps_cursors()
+    
+    print("=" * 60)
+    print("✓ All poller tests passed!")
+
+
+if __name__ == "__main__":
+    run_all_tests()
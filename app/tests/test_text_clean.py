@@ -0,0 +1,110 @@
+"""
+Tests for text cleaning utilities.
+Uses small synthetic email bodies.
+"""
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+
+from app.utils.text_clean import extract_plain_text, extract_plain_text_batch, mask_entities, strip_html, truncate_text
+
+
+def test_strip_html_xhtml_declaration():
+    """Test XHTML bodies with an XML declaration, as str and bytes."""
+    html = (
+        '<?xml version="1.0" encoding="UTF-8"?>'
+        '<html><head><style>body{color:red}</style></head>'
+        '<body><p>Acme &amp; Co</p></body></html>'
+    )
+    
+    assert strip_html(html) == 'Acme & Co'
+    assert strip_html(html.encode('utf-8')) == 'Acme & Co'
+    assert extract_plain_text(html.encode('utf-8')) == 'Acme & Co'
+    
+    print("✓ Test 1 passed: XHTML declaration")
+
+
+def test_strip_html_whitespace_between_tags():
+    """Test that whitespace-only text between tags collapses to one space."""
+    assert strip_html('<a>link</a>  <div>Hi</div>') == 'link Hi'
+    assert strip_html('<p>a</p>\n  <p>b</p>') == 'a\nb'
+    assert strip_html('<p>a</p><script>x()</script>  <p>b</p>') == 'a b'
+    
+    print("✓ Test 2 passed: Whitespace between tags")
+
+
+def test_mask_entities():
+    """Test that URLs, emails and phone numbers are tagged and returned."""
+    text = (
+        "Apply at https://jobs.acme.com/apply?id=42 or mail jobs@acme.com.\n"
+        "Call +1 415-555-0100 or 415.555.0199 (ref 12345)."
+    )
+    masked, captured = mask_entities(text)
+    
+    assert masked == "Apply at URL or mail EMAIL.\nCall PHONE or PHONE (ref 12345)."
+    assert captured == {
+        'URL': ['https://jobs.acme.com/apply?id=42'],
+        'EMAIL': ['jobs@acme.com'],
+        'PHONE': ['+1 415-555-0100', '415.555.0199'],
+    }
+    
+    # Digits on separate lines are not one phone number
+    masked, captured = mask_entities("Req 12345\n67890\n2024")
+    assert masked == "Req 12345\n67890\n2024"
+    assert captured['PHONE'] == []
+    
+    assert mask_entities("") == ("", {'URL': [], 'EMAIL': [], 'PHONE': []})
+    
+    print("✓ Test 3 passed: Mask entities")
+
+
+def test_truncate_text():
+    """Test truncation at a word boundary, and mid-word when none is close."""
+    assert truncate_text("short text", 20) == "short text"
+    assert truncate_text("", 5) == ""
+    
+    # Last space keeps >= 80% of max_length: cut there
+    assert truncate_text("Software Engineer Intern position", 20) == "Software Engineer..."
+    
+    # Last space too early: cut mid-word at max_length
+    assert truncate_text("Hi Supercalifragilistic", 10) == "Hi Superca..."
+    assert truncate_text("x" * 30, 10) == "x" * 10 + "..."
+    
+    print("✓ Test 4 passed: Truncate text")
+
+
+def test_extract_plain_text_batch():
+    """Test that batch extraction matches per-item extraction, in order."""
+    items = [
+        '<html><body><p>First &amp; one</p></body></html>',
+        'Plain   text body',
+        '<div>Caf\u00e9</div>'.encode('utf-8'),
+        '',
+        '<p>a</p>\n  <p>b</p>',
+    ]
+    
+    assert extract_plain_text_batch(items) == [extract_plain_text(item) for item in items]
+    assert extract_plain_text_batch(items)[:3] == ['First & one', 'Plain text body', 'Caf\u00e9']
+    assert extract_plain_text_batch([]) == []
+    
+    print("✓ Test 5 passed: Batch extraction")
+
+
+def run_all_tests():
+    """Run all text_clean tests."""
+    print("Running text_clean tests...")
+    print("=" * 60)
+    
+    test_strip_html_xhtml_declaration()
+    test_strip_html_whitespace_between_tags()
+    test_mask_entities()
+    test_truncate_text()
+    test_extract_plain_text_batch()
+    
+    print("=" * 60)
+    print("✓ All text_clean tests passed!")
+
+
+if __name__ == "__main__":
+    run_all_tests()
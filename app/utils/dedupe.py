@@ -1,8 +1,114 @@
 """
 Deduplication utilities for tracking processed emails.
 """
-from typing import Set
-from app.db.models import is_email_processed
+import hashlib
+import math
+import re
+from functools import lru_cache
+from typing import Dict, Iterator, List, Set
+from app.db.models import get_all_processed_ids, get_processed_ids, is_email_processed
+
+# Bloom filter sizing for the processed-id fast path
+_BLOOM_CAPACITY = 1_000_000
+_BLOOM_ERROR_RATE = 0.001
+
+# Body chars that go into a content fingerprint
+_CONTENT_KEY_BODY_CHARS = 4096
+
+# URL query strings / fragments (tracking tokens differ between resends)
+_URL_QUERY_RE = re.compile(r'(https?://[^\s?#]*)[?#]\S*')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+class _BloomFilter:
+    """Fixed-size Bloom filter over strings: no false negatives."""
+    
+    def __init__(self, capacity: int, error_rate: float):
+        """
+        Size the bit array and hash count for a target false-positive rate.
+        
+        Args:
+            capacity: Number of items the filter is sized for
+            error_rate: False-positive rate at capacity (e.g. 0.001)
+        """
+        self.num_bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.num_bits + 7) // 8)
+    
+    def _positions(self, item: str) -> Iterator[int]:
+        """
+        Bit positions for an item.
+        
+        Args:
+            item: String to hash
+        
+        Returns:
+            Iterator over num_hashes bit indexes
+        """
+        # Double hashing: two 64-bit halves of one digest give all k positions
+        digest = hashlib.blake2b(item.encode('utf-8'), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return ((h1 + i * h2) % self.num_bits for i in range(self.num_hashes))
+    
+    def add(self, item: str):
+        """
+        Add an item to the filter.
+        
+        Args:
+            item: String to add
+        """
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+    
+    def __contains__(self, item: str) -> bool:
+        """
+        Check whether an item may have been added.
+        
+        Args:
+            item: String to look up
+        
+        Returns:
+            False if the item was never added; True if it probably was
+        """
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+@lru_cache(maxsize=None)
+def _seen_ids() -> _BloomFilter:
+    """Bloom filter of every message ID seen so far (seeded from the DB once)."""
+    bloom = _BloomFilter(_BLOOM_CAPACITY, _BLOOM_ERROR_RATE)
+    for message_id in get_all_processed_ids():
+        bloom.add(message_id)
+    return bloom
+
+
+def _normalize_for_key(text: str) -> str:
+    """Lowercase, drop URL query strings and collapse whitespace."""
+    text = _URL_QUERY_RE.sub(r'\1', text.lower())
+    return _WHITESPACE_RE.sub(' ', text).strip()
+
+
+def content_key(message: Dict) -> bytes:
+    """
+    Fingerprint an email's content, to spot resends under a new message ID.
+    
+    The sender is part of the key so that identical templates from
+    different companies are never merged.
+    
+    Args:
+        message: Message dictionary with 'from', 'subject' and 'body'
+    
+    Returns:
+        16-byte blake2b digest of the normalized sender, subject and body prefix
+    """
+    parts = (
+        message.get('from', ''),
+        message.get('subject', ''),
+        message.get('body', '')[:_CONTENT_KEY_BODY_CHARS],
+    )
+    text = '\x00'.join(_normalize_for_key(part) for part in parts)
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
 
 
 def is_duplicate(message_id: str) -> bool:
@@ -28,10 +134,30 @@ def get_unprocessed_messages(messages: list) -> list:
     Returns:
         List of unprocessed messages
     """
-    unprocessed = []
+    unprocessed = set(get_unprocessed_ids([msg['id'] for msg in messages]))
+    
+    return [msg for msg in messages if msg['id'] in unprocessed]
+
+
+def get_unprocessed_ids(message_ids: List[str]) -> List[str]:
+    """
+    Filter out already-processed message IDs, so their bodies are never fetched.
+    
+    IDs the Bloom filter has never seen are new without asking the DB; only
+    possible repeats are confirmed with one batched query.
+    
+    Args:
+        message_ids: Gmail message IDs
+    
+    Returns:
+        Unprocessed message IDs, in input order
+    """
+    seen = _seen_ids()
+    processed = get_processed_ids([message_id for message_id in message_ids if message_id in seen])
     
-    for msg in messages:
-        if not is_duplicate(msg['id']):
-            unprocessed.append(msg)
+    # Added before they are processed: a message that then fails is only a
+    # Bloom hit next time, and the DB check still reports it unprocessed
+    for message_id in message_ids:
+        seen.add(message_id)
     
-    return unprocessed
+    return [message_id for message_id in message_ids if message_id not in processed]
@@ -4,8 +4,11 @@ Handles OAuth authentication and message retrieval.
 """
 import os
 import base64
+import random
+import threading
+import time
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Set, Tuple
 from email.utils import parsedate_to_datetime
 
 from google.auth.transport.requests import Request
@@ -14,26 +17,113 @@ from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
-from app.config import GMAIL_SCOPES, GOOGLE_CLIENT_SECRET_PATH, GOOGLE_TOKEN_PATH, GMAIL_USER
+from app.config import (
+    GMAIL_SCOPES, GOOGLE_CLIENT_SECRET_PATH, GOOGLE_TOKEN_PATH, GMAIL_USER, POLL_MAX_MESSAGES
+)
 from app.utils.logger import setup_logger
 from app.utils.text_clean import extract_plain_text
 
 logger = setup_logger(__name__)
 
+# messages.get sub-requests per batch HTTP call (Gmail allows 100, but
+# smaller batches are far less likely to be rate limited)
+_BATCH_SIZE = 50
+
+# Partial response for messages.get: only what _parse_message reads (no
+# historyId, sizeEstimate, raw part headers, filenames, ...). body/size
+# keeps every body object non-empty so it is never dropped from the response.
+_MESSAGE_FIELDS = (
+    "id,threadId,labelIds,snippet,"
+    "payload(mimeType,headers,body(size,data),parts(mimeType,body(size,data)))"
+)
+
+# Message IDs per messages.list page (the API maximum)
+_LIST_PAGE_SIZE = 500
+
+# Common job platforms and keywords, as one Gmail search (parenthesised so
+# the after: filter applies to the whole union)
+_JOB_SEARCH_QUERY = (
+    "(from:(greenhouse.io OR lever.co OR workday.com OR myworkdayjobs.com"
+    " OR icims.com OR smartrecruiters.com OR taleo.net OR successfactors.com"
+    " OR jobvite.com OR ashbyhq.com OR jazz.co OR breezy.hr)"
+    ' OR subject:("application" OR "interview" OR "assessment" OR "coding challenge"))'
+)
+
+# Transient Gmail errors (rate limit / backend) worth retrying
+_RETRY_STATUSES = (429, 500, 503)
+_MAX_ATTEMPTS = 5
+_MAX_BACKOFF_SECONDS = 32
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Check whether an API error is a transient one worth retrying."""
+    return isinstance(error, HttpError) and error.resp.status in _RETRY_STATUSES
+
+
+def _retry_delay(attempt: int, error: HttpError) -> float:
+    """
+    Seconds to wait before retrying after a transient error.
+    
+    Args:
+        attempt: Zero-based attempt number that failed
+        error: The error returned by Gmail
+    
+    Returns:
+        Retry-After if Gmail sent one, else exponential backoff with jitter
+    """
+    retry_after = error.resp.get('retry-after')
+    if retry_after:
+        try:
+            return min(float(retry_after), _MAX_BACKOFF_SECONDS)
+        except ValueError:
+            pass
+    return min(2 ** attempt + random.random(), _MAX_BACKOFF_SECONDS)
+
 
 class GmailClient:
     """Gmail API client for reading job-related emails."""
     
+    # Credentials shared by every client in the process, so re-creating a
+    # client does not re-read (or re-write) the token file
+    _shared_creds = None
+    _creds_lock = threading.Lock()
+    
     def __init__(self):
         self.service = None
+        self._creds = None
+        # httplib2 (and so the API service) is not thread-safe: one per thread
+        self._local = threading.local()
+        # Every service built by this client, so close() can reach them all
+        self._services = []
         self._authenticate()
     
     def _authenticate(self):
         """Authenticate with Gmail API using OAuth2."""
-        creds = None
+        with GmailClient._creds_lock:
+            creds = GmailClient._shared_creds
+            if not creds or not creds.valid:
+                creds = self._load_credentials(creds)
+                GmailClient._shared_creds = creds
+        
+        self._creds = creds
+        # Discovery is served from the bundled document; skip the file cache
+        self.service = build('gmail', 'v1', credentials=creds, cache_discovery=False)
+        self._local.service = self.service
+        self._services.append(self.service)
+        logger.info("Gmail API client initialized")
+    
+    def _load_credentials(self, creds: Optional[Credentials] = None) -> Credentials:
+        """
+        Load, refresh or obtain OAuth2 credentials, saving them when they change.
+        
+        Args:
+            creds: Previously loaded credentials, if any
         
+        Returns:
+            Valid credentials
+        """
         # Load existing token
-        if os.path.exists(GOOGLE_TOKEN_PATH):
+        if creds is None and os.path.exists(GOOGLE_TOKEN_PATH):
             creds = Credentials.from_authorized_user_file(GOOGLE_TOKEN_PATH, GMAIL_SCOPES)
         
         # If no valid credentials, authenticate
@@ -54,49 +144,109 @@ class GmailClient:
             
             logger.info("Credentials saved")
         
-        self.service = build('gmail', 'v1', credentials=creds)
-        logger.info("Gmail API client initialized")
+        return creds
+    
+    def _get_service(self):
+        """
+        Get the Gmail API service for the calling thread.
+        
+        Returns:
+            Gmail API service resource, built on first use in each thread
+        """
+        service = getattr(self._local, 'service', None)
+        if service is None:
+            service = build('gmail', 'v1', credentials=self._creds, cache_discovery=False)
+            self._local.service = service
+            self._services.append(service)
+        return service
+    
+    def close(self):
+        """
+        Close the HTTP connections held by this client's services.
+        
+        httplib2 keeps its keep-alive sockets open until closed; the client
+        stays usable and reconnects on the next request.
+        """
+        for service in self._services:
+            service.close()
+    
+    def _execute_with_retry(self, request, max_attempts: int = _MAX_ATTEMPTS):
+        """
+        Execute an API request, retrying rate-limit and backend errors.
+        
+        Args:
+            request: Request (or batch) with an execute() method
+            max_attempts: Attempts before the last error is raised
+        
+        Returns:
+            The request's response
+        """
+        for attempt in range(max_attempts):
+            try:
+                return request.execute()
+            except HttpError as error:
+                if not _is_retryable(error) or attempt == max_attempts - 1:
+                    raise
+                delay = _retry_delay(attempt, error)
+                logger.warning("Gmail API returned %s, retrying in %.1fs", error.resp.status, delay)
+                time.sleep(delay)
     
     def query_messages(
         self,
         query: str,
         max_results: int = 100,
-        after_date: Optional[datetime] = None
+        after_date: Optional[datetime] = None,
+        page_size: int = _LIST_PAGE_SIZE,
+        raise_errors: bool = False
     ) -> List[str]:
         """
-        Query Gmail messages by search query.
+        Query Gmail messages by search query, following result pages.
         
         Args:
             query: Gmail search query
             max_results: Maximum number of messages to return
             after_date: Only return messages after this date
+            page_size: Message IDs requested per list call (Gmail allows 500)
+            raise_errors: Re-raise HttpError instead of returning the pages
+                fetched so far
         
         Returns:
             List of message IDs
         """
+        # Add date filter if provided
+        if after_date:
+            date_str = after_date.strftime('%Y/%m/%d')
+            query = f"{query} after:{date_str}"
+        
+        logger.info("Querying Gmail: %s", query)
+        
+        service = self._get_service()
+        message_ids = []
+        page_token = None
+        
         try:
-            # Add date filter if provided
-            if after_date:
-                date_str = after_date.strftime('%Y/%m/%d')
-                query = f"{query} after:{date_str}"
-            
-            logger.info(f"Querying Gmail: {query}")
-            
-            results = self.service.users().messages().list(
-                userId=GMAIL_USER,
-                q=query,
-                maxResults=max_results
-            ).execute()
-            
-            messages = results.get('messages', [])
-            message_ids = [msg['id'] for msg in messages]
-            
-            logger.info(f"Found {len(message_ids)} messages")
-            return message_ids
+            while len(message_ids) < max_results:
+                results = self._execute_with_retry(service.users().messages().list(
+                    userId=GMAIL_USER,
+                    q=query,
+                    maxResults=min(page_size, max_results - len(message_ids)),
+                    pageToken=page_token
+                ))
+                
+                message_ids.extend(msg['id'] for msg in results.get('messages', []))
+                
+                page_token = results.get('nextPageToken')
+                if not page_token:
+                    break
         
         except HttpError as error:
-            logger.error(f"Gmail API error: {error}")
-            return []
+            # Keep the pages fetched so far
+            logger.error("Gmail API error: %s", error)
+            if raise_errors:
+                raise
+        
+        logger.info("Found %s messages", len(message_ids))
+        return message_ids
     
     def get_message(self, message_id: str) -> Optional[Dict]:
         """
@@ -109,45 +259,124 @@ class GmailClient:
             Message dictionary with metadata and body
         """
         try:
-            message = self.service.users().messages().get(
+            message = self._execute_with_retry(self._get_service().users().messages().get(
                 userId=GMAIL_USER,
                 id=message_id,
-                format='full'
-            ).execute()
-            
-            # Extract headers
-            headers = {
-                header['name']: header['value']
-                for header in message['payload'].get('headers', [])
-            }
+                format='full',
+                fields=_MESSAGE_FIELDS
+            ))
             
-            # Extract body
-            body = self._extract_body(message['payload'])
-            
-            # Parse date
-            date_str = headers.get('Date', '')
-            try:
-                received_at = parsedate_to_datetime(date_str)
-            except Exception:
-                received_at = datetime.utcnow()
-            
-            return {
-                'id': message['id'],
-                'thread_id': message['threadId'],
-                'subject': headers.get('Subject', ''),
-                'from': headers.get('From', ''),
-                'to': headers.get('To', ''),
-                'date': date_str,
-                'received_at': received_at,
-                'snippet': message.get('snippet', ''),
-                'body': body,
-                'labels': message.get('labelIds', [])
-            }
+            return self._parse_message(message)
         
         except HttpError as error:
-            logger.error(f"Error fetching message {message_id}: {error}")
+            logger.error("Error fetching message %s: %s", message_id, error)
             return None
     
+    def get_messages(self, message_ids: List[str]) -> List[Dict]:
+        """
+        Get full message details for several messages via batch requests.
+        
+        Args:
+            message_ids: Gmail message IDs
+        
+        Returns:
+            Message dictionaries (same order as message_ids, each message
+            once); messages that failed to fetch are left out
+        """
+        fetched = {}
+        retry_ids = []
+        last_errors = {}
+        
+        def on_response(request_id, response, exception):
+            if exception is not None:
+                if _is_retryable(exception):
+                    retry_ids.append(request_id)
+                    last_errors[request_id] = exception
+                else:
+                    logger.error("Error fetching message %s: %s", request_id, exception)
+                return
+            fetched[request_id] = self._parse_message(response)
+        
+        # Batch request_ids must be unique; dict.fromkeys keeps first-seen order
+        message_ids = list(dict.fromkeys(message_ids))
+        service = self._get_service()
+        pending = list(message_ids)
+        
+        for attempt in range(_MAX_ATTEMPTS):
+            # One HTTP round trip per chunk instead of one per message
+            for start in range(0, len(pending), _BATCH_SIZE):
+                batch = service.new_batch_http_request(callback=on_response)
+                for message_id in pending[start:start + _BATCH_SIZE]:
+                    batch.add(
+                        service.users().messages().get(
+                            userId=GMAIL_USER,
+                            id=message_id,
+                            format='full',
+                            fields=_MESSAGE_FIELDS
+                        ),
+                        request_id=message_id
+                    )
+                
+                try:
+                    self._execute_with_retry(batch)
+                except HttpError as error:
+                    logger.error("Gmail batch request error: %s", error)
+            
+            if not retry_ids:
+                break
+            
+            # Sub-requests that were rate limited go into a follow-up batch
+            pending = list(retry_ids)
+            retry_ids.clear()
+            if attempt < _MAX_ATTEMPTS - 1:
+                delay = max(_retry_delay(attempt, last_errors[message_id]) for message_id in pending)
+                logger.warning("Retrying %s rate-limited messages in %.1fs", len(pending), delay)
+                time.sleep(delay)
+        else:
+            for message_id in pending:
+                logger.error("Error fetching message %s: %s", message_id, last_errors[message_id])
+        
+        return [fetched[message_id] for message_id in message_ids if message_id in fetched]
+    
+    def _parse_message(self, message: Dict) -> Dict:
+        """
+        Convert a Gmail API message resource into a message dictionary.
+        
+        Args:
+            message: Message resource fetched with format='full'
+        
+        Returns:
+            Message dictionary with metadata and body
+        """
+        # Extract headers
+        headers = {
+            header['name']: header['value']
+            for header in message['payload'].get('headers', [])
+        }
+        
+        # Extract body
+        body = self._extract_body(message['payload'])
+        
+        # Parse date
+        date_str = headers.get('Date', '')
+        try:
+            received_at = parsedate_to_datetime(date_str)
+        except Exception:
+            received_at = datetime.utcnow()
+        
+        return {
+            'id': message['id'],
+            'thread_id': message['threadId'],
+            'subject': headers.get('Subject', ''),
+            'from': headers.get('From', ''),
+            'to': headers.get('To', ''),
+            'date': date_str,
+            'received_at': received_at,
+            'snippet': message.get('snippet', ''),
+            'body': body,
+            'labels': message.get('labelIds', [])
+        }
+    
     def _extract_body(self, payload: Dict) -> str:
         """
         Extract email body from message payload.
@@ -162,26 +391,34 @@ class GmailClient:
         
         # Check if message has parts
         if 'parts' in payload:
-            for part in payload['parts']:
-                if part['mimeType'] == 'text/plain':
-                    data = part['body'].get('data', '')
-                    if data:
-                        body = base64.urlsafe_b64decode(data).decode('utf-8')
-                        break
-                elif part['mimeType'] == 'text/html':
-                    data = part['body'].get('data', '')
-                    if data:
-                        html = base64.urlsafe_b64decode(data).decode('utf-8')
-                        body = extract_plain_text(html)
+            parts = payload['parts']
+            
+            # Prefer text/plain; HTML is only decoded and stripped without it
+            data = next((
+                part['body']['data'] for part in parts
+                if part['mimeType'] == 'text/plain' and part['body'].get('data')
+            ), None)
+            if data:
+                body = base64.urlsafe_b64decode(data).decode('utf-8')
+            else:
+                data = next((
+                    part['body']['data'] for part in reversed(parts)
+                    if part['mimeType'] == 'text/html' and part['body'].get('data')
+                ), None)
+                if data:
+                    # MIME type already says HTML: no need to sniff for tags
+                    body = extract_plain_text(base64.urlsafe_b64decode(data), is_html=True)
         else:
             # No parts, get body directly
             data = payload['body'].get('data', '')
             if data:
-                body = base64.urlsafe_b64decode(data).decode('utf-8')
+                raw = base64.urlsafe_b64decode(data)
                 
-                # Clean if HTML
+                # Clean if HTML (handing over the raw UTF-8 bytes)
                 if payload.get('mimeType') == 'text/html':
-                    body = extract_plain_text(body)
+                    body = extract_plain_text(raw, is_html=True)
+                else:
+                    body = raw.decode('utf-8')
         
         return body.strip()
     
@@ -199,14 +436,83 @@ class GmailClient:
         # Query for messages
         message_ids = self.query_messages(query=query, after_date=since, max_results=100)
         
-        # Fetch full message details
-        messages = []
-        for msg_id in message_ids:
-            msg = self.get_message(msg_id)
-            if msg:
-                messages.append(msg)
+        # Fetch full message details (batched)
+        return self.get_messages(message_ids)
+    
+    def get_history_id(self) -> Optional[str]:
+        """
+        Get the mailbox's current history ID.
         
-        return messages
+        Returns:
+            History ID, or None if the profile could not be fetched
+        """
+        try:
+            profile = self._execute_with_retry(
+                self._get_service().users().getProfile(userId=GMAIL_USER)
+            )
+            return profile.get('historyId')
+        
+        except HttpError as error:
+            logger.error("Gmail API error fetching profile: %s", error)
+            return None
+    
+    def get_added_message_ids(self, start_history_id: str) -> Optional[Tuple[Set[str], str]]:
+        """
+        Get IDs of messages added to the mailbox since a history ID.
+        
+        Args:
+            start_history_id: History ID saved from an earlier call
+        
+        Returns:
+            Tuple of (added message IDs, current history ID), or None if the
+            history is unavailable (e.g. start_history_id has expired)
+        """
+        service = self._get_service()
+        added_ids = set()
+        page_token = None
+        
+        try:
+            while True:
+                response = self._execute_with_retry(service.users().history().list(
+                    userId=GMAIL_USER,
+                    startHistoryId=start_history_id,
+                    historyTypes=['messageAdded'],
+                    pageToken=page_token
+                ))
+                
+                for record in response.get('history', []):
+                    for added in record.get('messagesAdded', []):
+                        added_ids.add(added['message']['id'])
+                
+                page_token = response.get('nextPageToken')
+                if not page_token:
+                    return added_ids, response['historyId']
+        
+        except HttpError as error:
+            if error.resp.status == 404:
+                logger.info("History %s expired, falling back to search", start_history_id)
+            else:
+                logger.error("Gmail API error listing history: %s", error)
+            return None
+    
+    def search_job_related_ids(self, since: Optional[datetime] = None, raise_errors: bool = False) -> List[str]:
+        """
+        Search for job-related message IDs without fetching the messages.
+        
+        Args:
+            since: Optional datetime to search from
+            raise_errors: Re-raise HttpError instead of returning partial results
+        
+        Returns:
+            Message IDs, newest first (at most POLL_MAX_MESSAGES)
+        """
+        # One search for the whole union: Gmail returns each message once
+        return self.query_messages(
+            query=_JOB_SEARCH_QUERY,
+            after_date=since or datetime.utcnow() - timedelta(days=30),
+            max_results=POLL_MAX_MESSAGES,
+            raise_errors=raise_errors
+        )
     
     def search_job_related_emails(self, since: Optional[datetime] = None) -> List[Dict]:
         """
@@ -218,32 +524,11 @@ class GmailClient:
         Returns:
             List of job-related messages
         """
-        # Build search query for common job platforms and keywords
-        queries = [
-            "from:(greenhouse.io OR lever.co OR workday.com OR myworkdayjobs.com)",
-            "from:(icims.com OR smartrecruiters.com OR taleo.net OR successfactors.com)",
-            "from:(jobvite.com OR ashbyhq.com OR jazz.co OR breezy.hr)",
-            'subject:("application" OR "interview" OR "assessment" OR "coding challenge")',
-        ]
-        
-        all_messages = []
-        
-        for query in queries:
-            messages = self.get_messages_since(since or datetime.utcnow() - timedelta(days=30), query)
-            all_messages.extend(messages)
-        
-        # Deduplicate by message ID
-        seen = set()
-        unique_messages = []
-        for msg in all_messages:
-            if msg['id'] not in seen:
-                seen.add(msg['id'])
-                unique_messages.append(msg)
-        
-        logger.info(f"Found {len(unique_messages)} unique job-related emails")
+        unique_messages = self.get_messages(self.search_job_related_ids(since))
+        
+        logger.info("Found %s unique job-related emails", len(unique_messages))
         return unique_messages
 
-
 if __name__ == "__main__":
     # Test Gmail client
     client = GmailClient()
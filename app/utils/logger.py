@@ -9,6 +9,23 @@ from pathlib import Path
 from app.config import LOG_LEVEL
 
 
+class _CachedTimeFormatter(logging.Formatter):
+    """Formatter that renders the timestamp once per second, not per record."""
+    
+    def __init__(self, fmt: str, datefmt: str):
+        super().__init__(fmt, datefmt)
+        self._cached_second = None
+        self._cached_time = ""
+    
+    def formatTime(self, record: logging.LogRecord, datefmt: str = None) -> str:
+        # datefmt has no sub-second fields, so records within a second share it
+        second = int(record.created)
+        if second != self._cached_second:
+            self._cached_time = super().formatTime(record, datefmt)
+            self._cached_second = second
+        return self._cached_time
+
+
 def setup_logger(name: str, log_file: str = None) -> logging.Logger:
     """
     Set up a logger with console and optional file handlers.
@@ -32,7 +49,7 @@ def setup_logger(name: str, log_file: str = None) -> logging.Logger:
     console_handler.setLevel(logging.DEBUG)
     
     # Formatter
-    formatter = logging.Formatter(
+    formatter = _CachedTimeFormatter(
         '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
         datefmt='%Y-%m-%d %H:%M:%S'
     )
@@ -2,17 +2,74 @@
 Text cleaning utilities for email processing.
 Strips HTML, normalizes whitespace, and extracts plain text.
 """
+import hashlib
 import re
-from bs4 import BeautifulSoup
-from typing import Optional
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple, Union
 
+from lxml import etree
 
-def strip_html(html_content: str) -> str:
+# selectolax (lexbor) extracts text several times faster than lxml; optional,
+# falls back to lxml
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+_RE_HTML_TAG = re.compile(r'<[^>]+>')
+# Where strip_html breaks extracted text into lines: any line boundary that
+# str.splitlines() recognises, or a run of two or more spaces
+_RE_CHUNK_BREAK = re.compile(r' {2,}|[\n\r\v\f\x1c-\x1e\x85\u2028\u2029]+')
+# Horizontal whitespace variants become plain spaces and '\r' is dropped
+# (CRLF -> LF), so the run pattern below sees only ' ' and '\n'
+_WHITESPACE_TABLE = str.maketrans({
+    '\t': ' ', '\v': ' ', '\f': ' ', '\u00a0': ' ', '\r': None, '\u2028': '\n',
+})
+# Runs of 2+ spaces (group 1) or 3+ newlines (group 2); shorter runs are
+# already normalized, so they are not matched at all
+_RE_WHITESPACE_RUN = re.compile(r'( {2,})|(\n{3,})')
+_WHITESPACE_REPLACEMENTS = (None, ' ', '\n\n')
+# Markup that only real HTML carries: a known opening tag, any closing tag,
+# or a doctype/comment/XML declaration. Stray '<3' or '>>' quoting in plain
+# text won't match.
+_HAS_TAG_PATTERN = r'<(?:(?:html|head|body|div|p|span|table|tr|td|a|br|img|b|i|h[1-6])\b|/\w|!|\?)'
+_RE_HAS_TAG = re.compile(_HAS_TAG_PATTERN, re.IGNORECASE)
+_RE_HAS_TAG_BYTES = re.compile(_HAS_TAG_PATTERN.encode(), re.IGNORECASE)
+# Legal-form suffixes stripped by clean_company_name (lowercase); looked up
+# by last word, so adding entries costs nothing per call
+_COMPANY_SUFFIXES = frozenset(('inc', 'inc.', 'llc', 'ltd', 'ltd.', 'corporation', 'corp', 'corp.'))
+# Text that BeautifulSoup's get_text() left out (script/style and other
+# special string containers), and elements whose whitespace is kept as is
+_SKIPPED_TEXT_TAGS = frozenset(('script', 'style', 'template', 'rt', 'rp'))
+_PREFORMATTED_TAGS = frozenset(('pre', 'textarea'))
+_ASCII_WHITESPACE = ' \n\t\f\r'
+# Bodies at least this long skip lexbor (which builds a DOM) and are
+# always streamed through the lxml text parser
+_STREAMING_MIN_CHARS = 256_000
+# Cleaned text of recently parsed HTML bodies, keyed by a blake2b digest of
+# the raw bytes (retries and reply chains re-send the same body)
+_STRIPPED_CACHE_SIZE = 2048
+_stripped_cache = OrderedDict()
+_stripped_cache_lock = threading.Lock()
+# URLs, email addresses and phone numbers, matched in one pass; URL comes
+# first so an address inside a link stays part of the link; phones need 10+
+# digits so ISO dates and short ids are left alone
+_RE_ENTITY = re.compile(
+    r'(?P<URL>https?://\S+)'
+    r'|(?P<EMAIL>\b[\w.+-]+@[\w-]+\.[\w.-]+\b)'
+    r'|(?P<PHONE>(?<!\w)\+?(?:\d[ .-]?){9,}\d\b)'
+)
+
+
+def strip_html(html_content: Union[str, bytes], parser: Optional[etree.HTMLParser] = None) -> str:
     """
     Strip HTML tags and return plain text.
     
     Args:
-        html_content: HTML string
+        html_content: HTML string, or UTF-8 encoded HTML bytes
+        parser: Text parser from _new_text_parser() to reuse; forces the
+            lxml backend
     
     Returns:
         Plain text with HTML removed
@@ -20,30 +77,198 @@ def strip_html(html_content: str) -> str:
     if not html_content:
         return ""
     
+    text = None
+    if LexborHTMLParser is not None and parser is None and len(html_content) < _STREAMING_MIN_CHARS:
+        text = _lexbor_text(html_content)
+    
     try:
-        soup = BeautifulSoup(html_content, 'lxml')
-        
-        # Remove script and style elements
-        for script in soup(["script", "style"]):
-            script.decompose()
-        
-        # Get text
-        text = soup.get_text()
+        if text is None:
+            text = _streamed_text(html_content, parser)
         
-        # Break into lines and remove leading/trailing space
-        lines = (line.strip() for line in text.splitlines())
+        # Break into lines, and multi-headlines into a line each
+        chunks = _RE_CHUNK_BREAK.split(text)
         
-        # Break multi-headlines into a line each
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        
-        # Drop blank lines
-        text = '\n'.join(chunk for chunk in chunks if chunk)
-        
-        return text
+        # Strip each chunk and drop blank ones (map/filter stay in C)
+        return '\n'.join(filter(None, map(str.strip, chunks)))
     
-    except Exception as e:
+    except (etree.LxmlError, ValueError):
         # Fallback: simple regex-based HTML removal
-        return re.sub(r'<[^>]+>', '', html_content)
+        if isinstance(html_content, bytes):
+            html_content = html_content.decode('utf-8', errors='replace')
+        return _RE_HTML_TAG.sub('', html_content)
+
+
+def _collapse_blank(data: str) -> str:
+    """
+    Collapse whitespace-only text between tags, as BeautifulSoup did.
+    
+    Such text becomes one newline if it contains one, else one space, so
+    "<a>x</a>  <b>y</b>" reads "x y" rather than being split into lines.
+    """
+    if data.strip(_ASCII_WHITESPACE):
+        return data
+    return '\n' if '\n' in data else ' '
+
+
+class _TextCollector:
+    """
+    lxml parser target that collects document text in order.
+    
+    Text inside script/style (and template/rt/rp, which get_text() also
+    skipped) is dropped; whitespace-only text nodes are collapsed with
+    _collapse_blank() except inside pre/textarea.
+    """
+    
+    def __init__(self):
+        self._parts = []
+        self._pending = []
+        self._skip_depth = 0
+        self._preformatted_depth = 0
+    
+    def _flush(self):
+        """End the current text node."""
+        if self._pending:
+            data = ''.join(self._pending)
+            self._pending = []
+            self._parts.append(data if self._preformatted_depth else _collapse_blank(data))
+    
+    def start(self, tag, attrib):
+        self._flush()
+        if tag in _SKIPPED_TEXT_TAGS:
+            self._skip_depth += 1
+        elif tag in _PREFORMATTED_TAGS:
+            self._preformatted_depth += 1
+    
+    def end(self, tag):
+        self._flush()
+        if tag in _SKIPPED_TEXT_TAGS:
+            self._skip_depth -= 1
+        elif tag in _PREFORMATTED_TAGS:
+            self._preformatted_depth -= 1
+    
+    def data(self, data):
+        if not self._skip_depth:
+            self._pending.append(data)
+    
+    def comment(self, text):
+        # Comments are dropped but still separate the text around them
+        self._flush()
+    
+    def pi(self, target, data=None):
+        self._flush()
+    
+    def close(self):
+        self._flush()
+        text = ''.join(self._parts)
+        # Ready for the next document when the parser is reused
+        self.__init__()
+        return text
+
+
+def _new_text_parser() -> etree.HTMLParser:
+    """lxml HTML parser that streams text into a _TextCollector."""
+    # Fixed encoding: an <?xml ... encoding=...?> declaration or a <meta>
+    # charset can't make libxml2 misread the UTF-8 input
+    return etree.HTMLParser(target=_TextCollector(), encoding='utf-8')
+
+
+def _streamed_text(html_content: Union[str, bytes], parser: Optional[etree.HTMLParser] = None) -> str:
+    """
+    Document text, collected while parsing without building a tree.
+    
+    libxml2 reports text through parser-target callbacks as it parses, so
+    memory stays proportional to the text rather than the markup (large
+    marketing/spam mails are mostly tags and attributes).
+    
+    Args:
+        html_content: HTML string, or UTF-8 encoded HTML bytes
+        parser: Text parser from _new_text_parser() to reuse
+    
+    Returns:
+        Concatenated text
+    """
+    data = html_content.encode('utf-8') if isinstance(html_content, str) else html_content
+    try:
+        parser = parser or _new_text_parser()
+        parser.feed(data)
+        return parser.close()
+    except UnicodeDecodeError:
+        # Invalid UTF-8 bytes: reset the parser, then retry with them replaced
+        try:
+            parser.close()
+        except (etree.LxmlError, UnicodeDecodeError):
+            pass
+        parser.feed(data.decode('utf-8', errors='replace').encode('utf-8'))
+        return parser.close()
+
+
+def _lexbor_text(html_content: Union[str, bytes]) -> Optional[str]:
+    """
+    Document text, parsed with selectolax's lexbor.
+    
+    Skips and collapses text like _TextCollector. Only malformed markup,
+    where the HTML5 tree builder places stray text differently, can give
+    a different result from the lxml path.
+    
+    Args:
+        html_content: HTML string, or UTF-8 encoded HTML bytes
+    
+    Returns:
+        Concatenated text, or None if lexbor could not parse the input
+    """
+    if isinstance(html_content, bytes):
+        html_content = html_content.decode('utf-8', errors='replace')
+    try:
+        tree = LexborHTMLParser(html_content)
+    except ValueError:
+        return None
+    
+    for node in tree.css(', '.join(_SKIPPED_TEXT_TAGS)):
+        node.decompose()
+    
+    root = tree.root
+    if root is None:
+        return ''
+    
+    parts = []
+    for node in root.traverse(include_text=True):
+        if node.tag == '-text':
+            data = node.text_content
+            if data and not _in_preformatted(node):
+                data = _collapse_blank(data)
+            parts.append(data)
+    return ''.join(parts)
+
+
+def _in_preformatted(node) -> bool:
+    """True if a lexbor node sits inside pre/textarea."""
+    node = node.parent
+    while node is not None:
+        if node.tag in _PREFORMATTED_TAGS:
+            return True
+        node = node.parent
+    return False
+
+
+def _strip_html_cached(html_content: Union[str, bytes], parser: Optional[etree.HTMLParser] = None) -> str:
+    """strip_html() behind a small LRU keyed by a digest of the content."""
+    raw = html_content.encode('utf-8') if isinstance(html_content, str) else html_content
+    key = hashlib.blake2b(raw, digest_size=16).digest()
+    
+    with _stripped_cache_lock:
+        text = _stripped_cache.get(key)
+        if text is not None:
+            _stripped_cache.move_to_end(key)
+            return text
+    
+    # Parse outside the lock; the poller's fetch thread may be parsing too
+    text = strip_html(html_content, parser)
+    
+    with _stripped_cache_lock:
+        _stripped_cache[key] = text
+        if len(_stripped_cache) > _STRIPPED_CACHE_SIZE:
+            _stripped_cache.popitem(last=False)
+    return text
 
 
 def normalize_whitespace(text: str) -> str:
@@ -59,11 +284,12 @@ def normalize_whitespace(text: str) -> str:
     if not text:
         return ""
     
-    # Replace multiple spaces with single space
-    text = re.sub(r' +', ' ', text)
+    # Map tabs, NBSPs etc. to spaces in one C-level pass
+    text = text.translate(_WHITESPACE_TABLE)
     
-    # Replace multiple newlines with double newline
-    text = re.sub(r'\n\n+', '\n\n', text)
+    # Collapse space runs to one space and newline runs to a blank line,
+    # in a single pass over the text
+    text = _RE_WHITESPACE_RUN.sub(lambda m: _WHITESPACE_REPLACEMENTS[m.lastindex], text)
     
     # Strip leading/trailing whitespace
     text = text.strip()
@@ -71,32 +297,94 @@ def normalize_whitespace(text: str) -> str:
     return text
 
 
-def extract_plain_text(html_or_text: str) -> str:
+def extract_plain_text(
+    html_or_text: Union[str, bytes],
+    is_html: Optional[bool] = None,
+    parser: Optional[etree.HTMLParser] = None
+) -> str:
     """
     Extract plain text from HTML or text content.
     
     Args:
-        html_or_text: HTML or plain text
+        html_or_text: HTML or plain text, as a string or UTF-8 bytes
+        is_html: True/False when the MIME type is known; None sniffs the
+            content for HTML tags
+        parser: Text parser from _new_text_parser() to reuse; forces the
+            lxml backend
     
     Returns:
         Clean plain text
     """
     # Check if content contains HTML
-    if '<' in html_or_text and '>' in html_or_text:
-        text = strip_html(html_or_text)
+    if is_html is None:
+        tag_re = _RE_HAS_TAG_BYTES if isinstance(html_or_text, bytes) else _RE_HAS_TAG
+        is_html = tag_re.search(html_or_text) is not None
+    
+    if is_html:
+        text = _strip_html_cached(html_or_text, parser)
+    elif isinstance(html_or_text, bytes):
+        text = html_or_text.decode('utf-8')
     else:
         text = html_or_text
     
     return normalize_whitespace(text)
 
 
+def extract_plain_text_batch(items: List[Union[str, bytes]]) -> List[str]:
+    """
+    Extract plain text from many bodies, reusing one HTML parser.
+    
+    lxml parsers are not thread-safe, so each call builds its own; run
+    batches from different threads with separate calls. With selectolax
+    installed no lxml parser is needed.
+    
+    Args:
+        items: HTML or plain-text bodies, as strings or UTF-8 bytes
+    
+    Returns:
+        Clean plain text per item, in input order
+    """
+    parser = _new_text_parser() if LexborHTMLParser is None else None
+    return [extract_plain_text(item, parser=parser) for item in items]
+
+
+def mask_entities(text: str) -> Tuple[str, Dict[str, List[str]]]:
+    """
+    Replace URLs, email addresses and phone numbers with placeholder tags.
+    
+    Shrinks link-heavy bodies before further processing; the originals are
+    returned so callers can still use them without re-scanning the text.
+    Not applied by extract_plain_text (ExtractAgent reads portal links
+    from the body).
+    
+    Args:
+        text: Plain text (e.g. from extract_plain_text)
+    
+    Returns:
+        (text with 'URL'/'EMAIL'/'PHONE' tags, {tag: [original values]})
+    """
+    captured = {'URL': [], 'EMAIL': [], 'PHONE': []}
+    if not text:
+        return "", captured
+    
+    def _replace(match):
+        tag = match.lastgroup
+        captured[tag].append(match.group())
+        return tag
+    
+    return _RE_ENTITY.sub(_replace, text), captured
+
+
 def truncate_text(text: str, max_length: int = 1000) -> str:
     """
-    Truncate text to maximum length.
+    Truncate text to maximum length, preferring a word boundary.
+    
+    The cut moves back to the last space if that keeps at least 80% of
+    max_length; otherwise the text is cut mid-word at max_length.
     
     Args:
         text: Input text
-        max_length: Maximum character length
+        max_length: Maximum character length (before the "...")
     
     Returns:
         Truncated text
@@ -104,7 +392,10 @@ def truncate_text(text: str, max_length: int = 1000) -> str:
     if not text or len(text) <= max_length:
         return text
     
-    return text[:max_length] + "..."
+    cut = text.rfind(' ', 0, max_length)
+    if cut < max_length * 0.8:
+        cut = max_length
+    return f"{text[:cut].rstrip()}..."
 
 
 def extract_email_domain(email: str) -> Optional[str]:
@@ -120,10 +411,23 @@ def extract_email_domain(email: str) -> Optional[str]:
     if not email or '@' not in email:
         return None
     
-    try:
-        return email.split('@')[1].lower()
-    except IndexError:
-        return None
+    # Text between the first and second '@', without building a list
+    return email.partition('@')[2].partition('@')[0].lower()
+
+
+def _strip_company_suffix(company: str) -> str:
+    """Drop one whitespace-separated legal suffix ("Inc.", "LLC", ...) from the end."""
+    # A single trailing newline is kept, as with a regex '$' anchor
+    head = company[:-1] if company.endswith('\n') else company
+    if not head or head[-1].isspace():
+        return company
+    
+    # One set lookup on the last word, however many suffixes there are
+    last_word = head.rsplit(None, 1)[-1]
+    stem = head[:-len(last_word)]
+    if stem and last_word.lower() in _COMPANY_SUFFIXES:
+        return stem.rstrip() + company[len(head):]
+    return company
 
 
 def clean_company_name(company: str) -> str:
@@ -140,7 +444,7 @@ def clean_company_name(company: str) -> str:
         return ""
     
     # Remove common suffixes
-    company = re.sub(r'\s+(Inc\.?|LLC|Ltd\.?|Corporation|Corp\.?)$', '', company, flags=re.IGNORECASE)
+    company = _strip_company_suffix(company)
     
     # Normalize whitespace
     company = normalize_whitespace(company)
@@ -4,37 +4,42 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from app.utils.gmail_client import GmailClient
-from app.agents.extract_agent import ExtractAgent
+from app.agents.extract_agent import process_batch
+
+# Only the first few emails are shown
+_SHOW_LIMIT = 15
 
 def debug_extractions():
     """Show extractions from recent job emails."""
     gmail = GmailClient()
-    extract_agent = ExtractAgent()
     
-    # Get recent job emails
-    messages = gmail.search_job_related_emails(since=None)
-    print(f"Found {len(messages)} job-related emails\n")
+    # Get recent job emails: list ids, then fetch just the ones shown
+    # (one batched request instead of every matching body)
+    try:
+        message_ids = gmail.search_job_related_ids(since=None)
+        print(f"Found {len(message_ids)} job-related emails\n")
+        messages = gmail.get_messages(message_ids[:_SHOW_LIMIT])
+    finally:
+        gmail.close()
+    
+    # Extract
+    extractions = process_batch([
+        {
+            'from': msg['from'],
+            'subject': msg['subject'],
+            'snippet': msg['snippet'],
+            'body': msg.get('body', '')
+        }
+        for msg in messages
+    ])
     
-    count = 0
-    for msg in messages:
-        count += 1
-        if count > 15:  # Only show first 15
-            break
-            
+    for count, (msg, extraction) in enumerate(zip(messages, extractions), 1):
         print(f"\n{'='*80}")
         print(f"Email #{count}")
         print(f"{'='*80}")
         print(f"Subject: {msg['subject'][:100]}")
         print(f"From: {msg['from'][:80]}")
         
-        # Extract
-        extraction = extract_agent.run({
-            'from': msg['from'],
-            'subject': msg['subject'],
-            'snippet': msg['snippet'],
-            'body': msg.get('body', '')
-        })
-        
         print(f"\nExtracted:")
         print(f"  Company: {extraction.get('company', 'N/A')}")
         print(f"  Role: {extraction.get('role_title', 'N/A')}")